@@ -0,0 +1,487 @@
+# backend/column_profile.py
+# numpy and pandas are imported only while a table is profiled, so loading this
+# module stays cheap.
+import os
+import ast
+import json
+import math
+import heapq
+import random
+import hashlib
+import logging
+from collections import Counter
+from operator import itemgetter
+
+logger = logging.getLogger(__name__)
+
+# HyperLogLog registers: 2**12 gives a standard error of about 1.6%
+HLL_PRECISION = 12
+# Items kept per level of the quantile sketch
+QUANTILE_SKETCH_SIZE = 200
+# Number of most frequent values tracked per column
+TOP_K_SIZE = 20
+# Ranks at which quantiles are compared between two profiles
+COMPARED_QUANTILES = [i / 20 for i in range(1, 20)]
+# Rows fetched per batch while profiling a table
+PROFILE_BATCH_SIZE = 10000
+# Version of the sketch hashing and serialization; saved profiles of another version are rebuilt
+PROFILE_FORMAT = 3
+
+
+def sqlite_sort_key(value):
+    """Sort key ordering mixed values like SQLite: NULL < numbers < text < blobs."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, bytes(value))
+
+
+def _encode_scalar(value):
+    """Make a column value JSON serializable."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"blob": bytes(value).hex()}
+    return value
+
+
+def _decode_scalar(value):
+    """Inverse of _encode_scalar."""
+    if isinstance(value, dict):
+        return bytes.fromhex(value["blob"])
+    return value
+
+
+def _value_label(value):
+    """Stable text label for a value, used for frequency counting."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "x'" + bytes(value).hex() + "'"
+    return repr(value)
+
+
+def _label_value(label):
+    """Inverse of _value_label."""
+    if label.startswith("x'"):
+        return bytes.fromhex(label[2:-1])
+    try:
+        return ast.literal_eval(label)
+    except ValueError:
+        return float(label)  # inf and -inf
+
+
+def split_numbers(values):
+    """Split column values into (numbers, texts), with blobs given as their labels.
+
+    Columns almost always hold a single kind of value, which is detected from
+    the distinct value types without looking at each value in Python.
+    """
+    types = set(map(type, values))
+    if types <= {int, float}:
+        return list(values), []
+    if types == {str}:
+        return [], list(values)
+    numbers = []
+    texts = []
+    for value in values:
+        if isinstance(value, (int, float)):
+            numbers.append(value)
+        elif isinstance(value, str):
+            texts.append(value)
+        else:
+            texts.append(_value_label(value))
+    return numbers, texts
+
+
+def hash_values(numbers, texts):
+    """Return stable 64-bit hashes (a numpy uint64 array) of distinct numbers and texts.
+
+    Numbers are hashed by value, so 1 and 1.0 are the same value as in SQLite.
+    Integers are hashed as 64-bit integers, since a float64 cannot tell large
+    ones apart; floats with an integral value are hashed like that integer.
+    """
+    import numpy as np
+    import pandas as pd
+
+    integers = [value for value in numbers if type(value) is int]
+    floats = np.array([value for value in numbers if type(value) is not int], dtype=np.float64)
+    integral = (floats == np.floor(floats)) & (np.abs(floats) < 2.0 ** 63)
+    integers = np.concatenate([np.array(integers, dtype=np.int64), floats[integral].astype(np.int64)])
+    # Adding 0.0 turns -0.0 into 0.0
+    fractions = floats[~integral] + 0.0
+    hashes = [pd.util.hash_array(integers), pd.util.hash_array(fractions)]
+    if texts:
+        hashes.append(pd.util.hash_array(np.array(texts, dtype=object)))
+    return np.concatenate(hashes)
+
+
+def _bit_length(values):
+    """Vectorized int.bit_length() of a numpy uint64 array."""
+    import numpy as np
+
+    lengths = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        large = values >= np.uint64(1 << shift)
+        values = np.where(large, values >> np.uint64(shift), values)
+        lengths += large.astype(np.uint8) * shift
+    return lengths + (values > 0)
+
+
+class HyperLogLog:
+    """Mergeable distinct count estimator."""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+
+    def add_hashes(self, hashes):
+        """Add a batch of 64-bit hashes (see hash_values)."""
+        import numpy as np
+
+        if not len(hashes):
+            return
+        remainder_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remainder_bits)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << remainder_bits) - 1)
+        rank = (remainder_bits + 1 - _bit_length(remainder)).astype(np.uint8)
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        np.maximum.at(registers, index, rank)
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            return m * math.log(m / zeros)
+        return raw
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["precision"], bytes.fromhex(data["registers"]))
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch (KLL-style compactors over numeric values).
+
+    Level ``i`` holds items standing for ``2**i`` original values. When a level
+    overflows it is sorted and every other item is promoted to the next level.
+    """
+
+    def __init__(self, size=QUANTILE_SKETCH_SIZE, levels=None):
+        self.size = size
+        self.levels = levels if levels is not None else [[]]
+        self._random = random.Random(0)
+
+    def add_many(self, values):
+        self.levels[0].extend(values)
+        if len(self.levels[0]) > self.size:
+            self._compress()
+
+    def _compress(self):
+        for level, items in enumerate(self.levels):
+            if len(items) <= self.size:
+                continue
+            items.sort()
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].extend(items[self._random.randint(0, 1)::2])
+            self.levels[level] = []
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].extend(items)
+        self._compress()
+
+    def quantiles(self, ranks):
+        """Return the estimated values at the given ranks (0..1), or None if empty."""
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        results = []
+        cumulative = 0
+        position = 0
+        for rank in sorted(ranks):
+            target = rank * total
+            while position < len(weighted) - 1 and cumulative + weighted[position][1] <= target:
+                cumulative += weighted[position][1]
+                position += 1
+            results.append(weighted[position][0])
+        return results
+
+    def to_dict(self):
+        return {"size": self.size, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["size"], [list(items) for items in data["levels"]])
+
+
+class TopK:
+    """Mergeable heavy hitters counter (Misra-Gries summary)."""
+
+    def __init__(self, size=TOP_K_SIZE, counts=None):
+        self.size = size
+        self.counts = counts if counts is not None else {}
+
+    def add_counts(self, counts):
+        """Add the exact counts of a batch of values (a Counter keyed by value).
+
+        Only the tracked values and the batch's most frequent ones can survive
+        merging the batch in, so the others are never labelled.
+        """
+        batch = {}
+        for label in self.counts:
+            value = _label_value(label)
+            if value in counts:
+                batch[label] = counts[value]
+        for value, count in heapq.nlargest(self.size + 1, counts.items(), key=itemgetter(1)):
+            batch.setdefault(_value_label(value), count)
+        self.merge(TopK(self.size, batch))
+
+    def merge(self, other):
+        for label, count in other.counts.items():
+            self.counts[label] = self.counts.get(label, 0) + count
+        if len(self.counts) > self.size:
+            threshold = sorted(self.counts.values(), reverse=True)[self.size]
+            self.counts = {key: count - threshold for key, count in self.counts.items() if count > threshold}
+
+    def to_dict(self):
+        return {"size": self.size, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["size"], dict(data["counts"]))
+
+
+class ColumnProfile:
+    """Streaming summary of one column: counts, min/max and mergeable sketches."""
+
+    def __init__(self):
+        self.count = 0
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog()
+        self.quantiles = QuantileSketch()
+        self.top_k = TopK()
+
+    def update(self, values):
+        """Add a batch of column values, NULLs included, to the profile.
+
+        Min and max are taken from the distinct values of the batch only.
+        """
+        counts = Counter(values)
+        nulls = counts.pop(None, 0)
+        self.count += len(values)
+        self.null_count += nulls
+        if not counts:
+            return
+        types = set(map(type, counts))
+        if types <= {int, float} or types == {str}:
+            low, high = min(counts), max(counts)
+        else:
+            low = min(counts, key=sqlite_sort_key)
+            high = max(counts, key=sqlite_sort_key)
+        if self.min is None or sqlite_sort_key(low) < sqlite_sort_key(self.min):
+            self.min = low
+        if self.max is None or sqlite_sort_key(high) > sqlite_sort_key(self.max):
+            self.max = high
+
+        numbers, texts = split_numbers(counts)
+        self.distinct.add_hashes(hash_values(numbers, texts))
+        self.top_k.add_counts(counts)
+        if not texts:
+            self.quantiles.add_many([value for value in values if value is not None] if nulls else values)
+        elif numbers:
+            self.quantiles.add_many([value for value in values if isinstance(value, (int, float))])
+
+    def merge(self, other):
+        """Merge another profile of the same column (e.g. from another partition) into this one."""
+        self.count += other.count
+        self.null_count += other.null_count
+        for value in (other.min, other.max):
+            if value is None:
+                continue
+            if self.min is None or sqlite_sort_key(value) < sqlite_sort_key(self.min):
+                self.min = value
+            if self.max is None or sqlite_sort_key(value) > sqlite_sort_key(self.max):
+                self.max = value
+        self.distinct.merge(other.distinct)
+        self.quantiles.merge(other.quantiles)
+        self.top_k.merge(other.top_k)
+
+    def summary(self):
+        """Return the readable statistics of this profile."""
+        return {
+            "count": self.count,
+            "null_count": self.null_count,
+            "min": _encode_scalar(self.min),
+            "max": _encode_scalar(self.max),
+            "distinct_estimate": round(self.distinct.estimate()) if self.count > self.null_count else 0
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "null_count": self.null_count,
+            "min": _encode_scalar(self.min),
+            "max": _encode_scalar(self.max),
+            "distinct": self.distinct.to_dict(),
+            "quantiles": self.quantiles.to_dict(),
+            "top_k": self.top_k.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls()
+        profile.count = data["count"]
+        profile.null_count = data["null_count"]
+        profile.min = _decode_scalar(data["min"])
+        profile.max = _decode_scalar(data["max"])
+        profile.distinct = HyperLogLog.from_dict(data["distinct"])
+        profile.quantiles = QuantileSketch.from_dict(data["quantiles"])
+        profile.top_k = TopK.from_dict(data["top_k"])
+        return profile
+
+
+def profile_table(conn, table_name, columns, batch_size=PROFILE_BATCH_SIZE):
+    """Build a ColumnProfile for each column of a table in one streaming pass.
+
+    Rows are read a batch at a time; each column's values in a batch are
+    counted once, and only their distinct values are hashed and compared for
+    min and max.
+    """
+    profiles = {col: ColumnProfile() for col in columns}
+    if not columns:
+        return profiles
+    quoted_columns = ['"' + col.replace('"', '""') + '"' for col in columns]
+    quoted_table = '"' + table_name.replace('"', '""') + '"'
+    cursor = conn.cursor()
+
+    cursor.execute(f"SELECT {', '.join(quoted_columns)} FROM {quoted_table}")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for col, values in zip(columns, zip(*rows)):
+            profiles[col].update(values)
+    logger.debug(f"Profiled {len(columns)} columns of table {table_name}")
+    return profiles
+
+
+def compare_profiles(profile1, profile2):
+    """Compare two column profiles and return (difference_score, details).
+
+    The score is the mean of the available distribution distances, each in [0, 1]:
+    null rate, distinct count, quantiles (numeric values only) and the
+    frequency distribution of the most common values.
+    """
+    components = {}
+
+    rate1 = profile1.null_count / profile1.count if profile1.count else 0
+    rate2 = profile2.null_count / profile2.count if profile2.count else 0
+    components["null_rate_diff"] = abs(rate1 - rate2)
+
+    distinct1 = profile1.summary()["distinct_estimate"]
+    distinct2 = profile2.summary()["distinct_estimate"]
+    components["distinct_diff"] = abs(distinct1 - distinct2) / max(distinct1, distinct2) if max(distinct1, distinct2) else 0
+
+    quantiles1 = profile1.quantiles.quantiles(COMPARED_QUANTILES)
+    quantiles2 = profile2.quantiles.quantiles(COMPARED_QUANTILES)
+    if quantiles1 and quantiles2:
+        span = max(quantiles1[-1], quantiles2[-1]) - min(quantiles1[0], quantiles2[0])
+        if span > 0:
+            components["quantile_diff"] = sum(abs(a - b) for a, b in zip(quantiles1, quantiles2)) / (len(quantiles1) * span)
+        else:
+            components["quantile_diff"] = 0.0
+    elif quantiles1 or quantiles2:
+        components["quantile_diff"] = 1.0
+
+    non_null1 = profile1.count - profile1.null_count
+    non_null2 = profile2.count - profile2.null_count
+    if non_null1 and non_null2:
+        labels = set(profile1.top_k.counts) | set(profile2.top_k.counts)
+        freq1 = {label: profile1.top_k.counts.get(label, 0) / non_null1 for label in labels}
+        freq2 = {label: profile2.top_k.counts.get(label, 0) / non_null2 for label in labels}
+        # Total variation distance, with everything outside the top values as one bucket
+        other1 = 1 - sum(freq1.values())
+        other2 = 1 - sum(freq2.values())
+        components["top_k_diff"] = min(1.0, (sum(abs(freq1[label] - freq2[label]) for label in labels) + abs(other1 - other2)) / 2)
+    elif non_null1 or non_null2:
+        components["top_k_diff"] = 1.0
+
+    score = sum(components.values()) / len(components)
+    return score, {
+        "profile_diff_score": score,
+        **components,
+        "db1": profile1.summary(),
+        "db2": profile2.summary()
+    }
+
+
+class ProfileStore:
+    """Directory of saved table profiles, reused while the source table is unchanged.
+
+    A profile is keyed by database path and table name and is valid as long as
+    the size and modification time of the database file and of its write-ahead
+    log (which holds committed writes in WAL mode until a checkpoint), and the
+    table's schema, match the fingerprint stored with it.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(conn, db_path, table_name):
+        cursor = conn.cursor()
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+        row = cursor.fetchone()
+        stat = os.stat(db_path)
+        try:
+            wal_stat = os.stat(db_path + "-wal")
+            wal = {"size": wal_stat.st_size, "mtime_ns": wal_stat.st_mtime_ns}
+        except OSError:
+            wal = None
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "wal": wal,
+                "schema": row[0] if row else None, "format": PROFILE_FORMAT}
+
+    def _path(self, db_path, table_name):
+        key = hashlib.sha1(f"{os.path.abspath(db_path)}\0{table_name}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, db_path, table_name, fingerprint):
+        """Return the saved profiles for a table, or None if missing or stale."""
+        path = self._path(db_path, table_name)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("fingerprint") != fingerprint:
+            return None
+        return {col: ColumnProfile.from_dict(profile) for col, profile in data["columns"].items()}
+
+    def save(self, db_path, table_name, fingerprint, profiles):
+        path = self._path(db_path, table_name)
+        try:
+            with open(path, 'w') as f:
+                json.dump({
+                    "db_path": os.path.abspath(db_path),
+                    "table": table_name,
+                    "fingerprint": fingerprint,
+                    "columns": {col: profile.to_dict() for col, profile in profiles.items()}
+                }, f)
+        except OSError as e:
+            logger.warning(f"Failed to save profile for table {table_name}: {e}")
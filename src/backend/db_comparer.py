@@ -1,10 +1,26 @@
 import sqlite3
-import pandas as pd
-import numpy as np
 import logging
+import time
+import copy
+import json
+import random
+from backend.column_profile import ProfileStore, profile_table, compare_profiles, sqlite_sort_key
+from backend.engines import get_engine, select_engine, proportion_interval, content_interval
 
 logger = logging.getLogger(__name__)
 
+# Stratified sampling used for the quick estimate of a progressive comparison
+PROGRESSIVE_SAMPLE_STRATA = 10
+PROGRESSIVE_ROWS_PER_STRATUM = 100
+# Rounds of random rowid draws for a sample when many rowids are unused, and the
+# most draws per stratum in a round as a multiple of the rows wanted
+ROWID_SAMPLE_PASSES = 4
+ROWID_SAMPLE_MAX_DRAW_FACTOR = 100
+# Seed of the random row samples, so repeated comparisons sample the same rows
+SAMPLE_SEED = 42
+# Minimum time (seconds) between snapshots published during a phase of a progressive comparison
+PROGRESSIVE_PUBLISH_INTERVAL = 0.25
+
 class SQLiteComparer:
     def __init__(self):
         self.db1_path = None
@@ -13,6 +29,8 @@ class SQLiteComparer:
         self.db2_conn = None
         self.differences = {}
         self.similarity_score = 0
+        # "auto" picks a comparison engine per table, or a name from backend.engines.ENGINE_MODULES forces it
+        self.engine = "auto"
         
     def connect_database1(self, db1_path):
         """Establish connection to the first database."""
@@ -82,9 +100,7 @@ class SQLiteComparer:
     
     def get_table_data(self, conn, table_name):
         """Get all data from a table as a DataFrame."""
-        df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-        logger.debug(f"Retrieved {len(df)} rows from table {table_name}")
-        return df
+        return get_engine("vectorized").get_table_data(conn, table_name)
     
     def calculate_table_structure_difference(self, structure1, structure2):
         """Calculate difference between two table structures."""
@@ -103,102 +119,666 @@ class SQLiteComparer:
         return difference_score, {"missing_in_db1": missing_in_1, "missing_in_db2": missing_in_2, "type_mismatches": type_mismatches}
     
     def calculate_table_data_difference(self, df1, df2):
-            """Calculate difference between two table datasets."""
-            # If columns don't match, we'll compare what we can
-            common_columns = list(set(df1.columns) & set(df2.columns))
-            if not common_columns:
-                logger.debug("No common columns found between tables")
-                return 1.0, {"row_count_diff": abs(len(df1) - len(df2)), "no_common_columns": True}
+        """Calculate difference between two table datasets."""
+        return get_engine("vectorized").calculate_table_data_difference(df1, df2)
+    
+    def choose_engine(self, table_name, columns, row_counts, engine=None):
+        """Return the name of the engine to compare a table's data with.
+        
+        ``engine`` overrides ``self.engine``; with "auto" the engine is chosen
+        from the table's size and schema.
+        """
+        engine = engine or self.engine
+        if engine == "auto":
+            engine = select_engine(row_counts, self.get_match_key(table_name, columns) is not None)
+        return engine
+    
+    def compare_table_data(self, table_name, columns, engine=None, row_counts=None):
+        """Compare the data of a table in both databases with a comparison engine.
+        
+        The engine is picked by ``choose_engine`` and recorded in the returned
+        details. ``row_counts`` saves counting the rows again if already known.
+        """
+        if row_counts is None:
+            row_counts = (self.get_row_count(self.db1_conn, table_name), self.get_row_count(self.db2_conn, table_name))
+        if not columns:
+            logger.debug("No common columns found between tables")
+            return 1.0, {"row_count_diff": abs(row_counts[0] - row_counts[1]), "no_common_columns": True}
+        
+        engine = self.choose_engine(table_name, columns, row_counts, engine)
+        logger.info(f"Comparing data of table {table_name} with the {engine} engine")
+        
+        data_diff, data_details = get_engine(engine).compare_table(self, table_name, columns, row_counts)
+        data_details.setdefault("engine", engine)
+        logger.debug(f"Data difference score: {data_diff}")
+        return data_diff, data_details
+    
+    def compare_databases(self, selected_tables=None, exporter=None):
+        """Compare the two databases and generate difference metrics.
+        
+        If an ``exporter`` (see ``backend.result_exporters``) is given, each
+        table's results are written to it as soon as the table is compared.
+        """
+        if not self.db1_conn or not self.db2_conn:
+            logger.error("Database connections not established")
+            return False
+        
+        logger.info("Starting database comparison")
+        common_tables = self._init_differences(selected_tables)
+        if exporter:
+            exporter.begin(self.db1_path, self.db2_path)
+        
+        # Compare structure and content of common tables
+        for table in common_tables:
+            logger.info(f"Comparing table: {table}")
             
-            # Subset to common columns for comparison
-            df1_common = df1[common_columns].copy().reset_index(drop=True)
-            df2_common = df2[common_columns].copy().reset_index(drop=True)
+            # Compare structure
+            structure_start = time.perf_counter()
+            structure1 = self.get_table_structure(self.db1_conn, table)
+            structure2 = self.get_table_structure(self.db2_conn, table)
             
-            # Row count difference contributes to the score
-            max_rows = max(len(df1), len(df2))
-            row_count_diff = abs(len(df1) - len(df2))
-            row_diff_score = row_count_diff / max_rows if max_rows > 0 else 0
+            structure_diff, structure_details = self.calculate_table_structure_difference(structure1, structure2)
             
-            # Try to merge them to find matching rows
-            if len(df1_common) > 0 and len(df2_common) > 0:
-                # For performance reasons on large datasets, we'll sample if very large
-                sample_size = min(10000, len(df1_common), len(df2_common))
-                if len(df1_common) > sample_size or len(df2_common) > sample_size:
-                    logger.info(f"Large dataset detected. Using sampling with size {sample_size}")
-                    df1_sample = df1_common.sample(sample_size, random_state=42) if len(df1_common) > sample_size else df1_common
-                    df2_sample = df2_common.sample(sample_size, random_state=42) if len(df2_common) > sample_size else df2_common
-                    
-                    # Calculate difference based on our samples
-                    cells_different = 0
-                    total_cells = sample_size * len(common_columns)
-                    
-                    for col in common_columns:
-                        # Handle different data types
-                        if df1_sample[col].dtype != df2_sample[col].dtype:
-                            try:
-                                # Try to convert to common type
-                                common_type = np.find_common_type([df1_sample[col].dtype, df2_sample[col].dtype], [])
-                                s1 = df1_sample[col].astype(str)
-                                s2 = df2_sample[col].astype(str)
-                                logger.debug(f"Converting column {col} to string for comparison due to type mismatch")
-                            except:
-                                # If conversion fails, treat as all different
-                                cells_different += sample_size
-                                logger.warning(f"Failed to convert column {col} to common type, treating all as different")
-                                continue
-                        else:
-                            s1 = df1_sample[col]
-                            s2 = df2_sample[col]
-                        
-                        # Count differences, handling NaN values
-                        # This is the key fix: Don't compare Series directly, compare values row by row
-                        for i in range(len(s1)):
-                            if i < len(s2):  # Make sure we have a value to compare
-                                val1 = s1.iloc[i]
-                                val2 = s2.iloc[i]
-                                # Check if both are NaN or equal
-                                if not ((pd.isna(val1) and pd.isna(val2)) or (val1 == val2)):
-                                    cells_different += 1
-                    
-                    content_diff_score = cells_different / total_cells if total_cells > 0 else 0
-                else:
-                    # For smaller datasets, we can do a more thorough comparison
-                    cells_different = 0
-                    total_cells = len(df1_common) * len(common_columns)
-                    
-                    for col in common_columns:
-                        # Don't compare Series directly - compare values row by row
-                        for i in range(len(df1_common)):
-                            if i < len(df2_common):  # Make sure we have a value to compare
-                                val1 = df1_common[col].iloc[i]
-                                val2 = df2_common[col].iloc[i]
-                                # Check if both are NaN or equal
-                                if not ((pd.isna(val1) and pd.isna(val2)) or (val1 == val2)):
-                                    cells_different += 1
-                    
-                    content_diff_score = cells_different / total_cells if total_cells > 0 else 0
-            else:
-                # If one of the dataframes is empty, they're completely different
-                content_diff_score = 1.0
+            # Compare data
+            data_start = time.perf_counter()
+            common_columns = sorted(set(structure1) & set(structure2))
+            data_diff, data_details = self.compare_table_data(table, common_columns)
+            data_end = time.perf_counter()
             
-            # Combine row count difference and content difference
-            overall_diff = (row_diff_score + content_diff_score) / 2
+            self.differences["table_details"][table] = {
+                "structure_diff_score": structure_diff,
+                "structure_details": structure_details,
+                "timings": {
+                    "structure": data_start - structure_start,
+                    "data": data_end - data_start
+                }
+            }
+            self._set_engine_data_difference(self.differences["table_details"][table], data_diff, data_details)
+            if exporter:
+                exporter.write_table(table, self.differences["table_details"][table])
+        
+        self._update_overall_scores()
+        if exporter:
+            exporter.finish(self.differences)
+        
+        logger.info(f"Comparison complete. Overall difference score: {self.differences['overall_diff_score']:.4f}")
+        return True
+    
+    def compare_databases_progressive(self, selected_tables=None, time_budget=None, on_update=None, exporter=None):
+        """Compare the two databases progressively, refining the result until it is exact.
+        
+        A quick estimate is built first from table fingerprints (row counts and
+        structure), then from stratified row samples, and finally every table is
+        compared exactly, largest uncertainty first. Tables compared by an engine
+        with ``iter_ranges`` (SQL and streaming) are refined one range or batch
+        of rows at a time, so the budget is checked within tables too.
+        
+        Snapshots are passed to ``on_update`` at the end of each phase and at most
+        every PROGRESSIVE_PUBLISH_INTERVAL seconds in between. A snapshot is a copy
+        of ``self.differences`` whose ``table_details`` only holds the tables
+        changed since the previous snapshot (all of them in the first), so the
+        receiver merges them into the details it already has. The comparison stops once
+        ``time_budget`` seconds have elapsed or every table has been compared by
+        its engine; tables the engine only samples remain estimates.
+        
+        If an ``exporter`` is given, each table is written to it once its result
+        is final (exact, or compared by its engine). Tables still estimated when
+        the comparison stops are written with their estimates before ``finish``.
+        """
+        if not self.db1_conn or not self.db2_conn:
+            logger.error("Database connections not established")
+            return False
+        
+        logger.info(f"Starting progressive database comparison (time budget: {time_budget}s)")
+        start_time = time.monotonic()
+        deadline = start_time + time_budget if time_budget is not None else None
+        
+        # Tables already compared by their engine; they stay estimates if it only sampled them
+        refined = set()
+        
+        def out_of_time():
+            return deadline is not None and time.monotonic() >= deadline
+        
+        # Tables changed since the last snapshot, and when it was published
+        changed = set()
+        last_publish = [None]
+        
+        def publish(phase, table=None, force=False):
+            if table is not None:
+                changed.add(table)
+            now = time.monotonic()
+            if not force and last_publish[0] is not None and now - last_publish[0] < PROGRESSIVE_PUBLISH_INTERVAL:
+                return
+            last_publish[0] = now
+            self._update_overall_scores()
+            table_details = self.differences["table_details"]
+            self.differences["progress"] = {
+                "phase": phase,
+                "exact": all(details["exact"] for details in table_details.values()),
+                "tables_exact": sum(1 for details in table_details.values() if details["exact"]),
+                "finished": all(details["exact"] or table in refined for table, details in table_details.items()),
+                "error_bound": self.differences["overall_error_bound"],
+                "elapsed": time.monotonic() - start_time
+            }
+            logger.info(f"Progressive comparison ({phase}): difference score "
+                        f"{self.differences['overall_diff_score']:.4f} "
+                        f"± {self.differences['overall_error_bound']:.4f}")
+            if on_update:
+                snapshot = {key: copy.deepcopy(value) for key, value in self.differences.items() if key != "table_details"}
+                snapshot["table_details"] = {name: copy.deepcopy(table_details[name]) for name in changed}
+                on_update(snapshot)
+            changed.clear()
+        
+        common_tables = sorted(self._init_differences(selected_tables))
+        table_details = self.differences["table_details"]
+        if exporter:
+            exporter.begin(self.db1_path, self.db2_path)
+        
+        # Tables already written to the exporter; each is written once
+        exported = set()
+        
+        def export(table):
+            if exporter and table not in exported:
+                exporter.write_table(table, table_details[table])
+                exported.add(table)
+        
+        # Phase 1: fingerprints. Structure is exact (it only reads the schema), content
+        # is only bounded by the row counts. Tables not counted in time stay unknown.
+        row_counts = {}
+        
+        def get_row_counts(table):
+            if table not in row_counts:
+                row_counts[table] = (self.get_row_count(self.db1_conn, table), self.get_row_count(self.db2_conn, table))
+            return row_counts[table]
+        
+        for table in common_tables:
+            structure1 = self.get_table_structure(self.db1_conn, table)
+            structure2 = self.get_table_structure(self.db2_conn, table)
+            structure_diff, structure_details = self.calculate_table_structure_difference(structure1, structure2)
+            common_columns = sorted(set(structure1) & set(structure2))
             
-            logger.debug(f"Data difference score: {overall_diff}")
-            return overall_diff, {
-                "row_count_diff": row_count_diff,
-                "content_diff_score": content_diff_score,
-                "row_diff_score": row_diff_score
+            table_details[table] = {
+                "structure_diff_score": structure_diff,
+                "structure_details": structure_details,
+                "common_columns": common_columns
             }
+            count1, count2 = (None, None) if out_of_time() else get_row_counts(table)
+            self._set_estimated_data_difference(table_details[table], count1, count2, 0.0, 1.0)
+            changed.add(table)
+            if table_details[table]["exact"]:
+                export(table)
+        publish("fingerprint", force=True)
+        
+        # Phase 2: stratified samples over rowid ranges
+        for table in common_tables:
+            if out_of_time():
+                break
+            details = table_details[table]
+            if details["exact"]:
+                continue
+            count1, count2 = get_row_counts(table)
+            columns = details["common_columns"]
+            cells_different, cells_sampled = self.sample_content_difference(table, columns)
+            low, high = content_interval(cells_different, cells_sampled, len(columns), count1)
+            self._set_estimated_data_difference(details, count1, count2, low, high)
+            if details["exact"]:
+                export(table)
+            publish("sample", table)
+        publish("sample", force=True)
+        
+        # Phase 3: exact comparison, most uncertain tables first
+        pending = sorted((table for table in common_tables if not table_details[table]["exact"]),
+                         key=lambda table: table_details[table]["data_diff_error_bound"], reverse=True)
+        for table in pending:
+            if out_of_time():
+                break
+            details = table_details[table]
+            counts = get_row_counts(table)
+            columns = details["common_columns"]
+            engine = self.choose_engine(table, columns, counts) if columns else None
+            if engine and counts[0] > 0 and hasattr(get_engine(engine), "iter_ranges"):
+                completed = self._refine_by_ranges(table, details, counts, engine, out_of_time,
+                                                   lambda: publish("exact", table))
+            else:
+                completed = False
+            if not completed and not out_of_time():
+                data_diff, data_details = self.compare_table_data(table, columns, engine, counts)
+                self._set_engine_data_difference(details, data_diff, data_details)
+                completed = True
+            if completed:
+                refined.add(table)
+                export(table)
+            publish("exact", table)
+        
+        # The final state, including changes held back by the publish interval
+        publish(self.differences["progress"]["phase"] if out_of_time() else "exact", force=True)
+        if exporter:
+            for table in common_tables:
+                export(table)
+            exporter.finish(self.differences)
+        
+        progress = self.differences["progress"]
+        if progress["exact"]:
+            logger.info(f"Progressive comparison complete. Overall difference score: {self.differences['overall_diff_score']:.4f}")
+        elif progress["finished"]:
+            logger.info(f"Progressive comparison complete with sampled tables. Overall difference score: "
+                        f"{self.differences['overall_diff_score']:.4f} ± {progress['error_bound']:.4f}")
+        else:
+            logger.info(f"Time budget exhausted with {progress['tables_exact']}/{len(common_tables)} tables exact")
+        return True
     
-    def compare_databases(self, selected_tables=None):
-        """Compare the two databases and generate difference metrics."""
+    def compare_column_profiles(self, selected_tables=None, profile_dir=None, exporter=None):
+        """Compare the databases by approximate column statistics instead of row by row.
+        
+        Each table is read once per database to build per-column profiles (null
+        counts, min/max, HyperLogLog distinct counts, quantile and top-k
+        sketches), which are compared for a distribution-level difference score
+        per column. With ``profile_dir`` the profiles are saved and reused in later
+        runs as long as the database file and table schema are unchanged.
+        With an ``exporter`` each table is written to it as soon as it is profiled.
+        """
         if not self.db1_conn or not self.db2_conn:
             logger.error("Database connections not established")
             return False
         
-        logger.info("Starting database comparison")
+        logger.info("Starting column profile comparison")
+        store = ProfileStore(profile_dir) if profile_dir else None
+        common_tables = self._init_differences(selected_tables)
+        if exporter:
+            exporter.begin(self.db1_path, self.db2_path)
         
+        for table in common_tables:
+            logger.info(f"Profiling table: {table}")
+            structure1 = self.get_table_structure(self.db1_conn, table)
+            structure2 = self.get_table_structure(self.db2_conn, table)
+            structure_diff, structure_details = self.calculate_table_structure_difference(structure1, structure2)
+            
+            profiles1 = self.get_table_profiles(self.db1_conn, self.db1_path, table, list(structure1), store)
+            profiles2 = self.get_table_profiles(self.db2_conn, self.db2_path, table, list(structure2), store)
+            
+            count1 = next(iter(profiles1.values())).count if profiles1 else 0
+            count2 = next(iter(profiles2.values())).count if profiles2 else 0
+            max_rows = max(count1, count2)
+            row_count_diff = abs(count1 - count2)
+            row_diff_score = row_count_diff / max_rows if max_rows > 0 else 0
+            
+            common_columns = sorted(set(profiles1) & set(profiles2))
+            if common_columns:
+                column_profiles = {}
+                for col in common_columns:
+                    _, column_profiles[col] = compare_profiles(profiles1[col], profiles2[col])
+                content_diff_score = sum(c["profile_diff_score"] for c in column_profiles.values()) / len(common_columns)
+                data_diff = (row_diff_score + content_diff_score) / 2
+                data_details = {
+                    "row_count_diff": row_count_diff,
+                    "content_diff_score": content_diff_score,
+                    "row_diff_score": row_diff_score,
+                    "column_profiles": column_profiles
+                }
+            else:
+                data_diff = 1.0
+                data_details = {"row_count_diff": row_count_diff, "no_common_columns": True}
+            
+            self.differences["table_details"][table] = {
+                "structure_diff_score": structure_diff,
+                "structure_details": structure_details,
+                "data_diff_score": data_diff,
+                "data_details": data_details
+            }
+            if exporter:
+                exporter.write_table(table, self.differences["table_details"][table])
+        
+        self._update_overall_scores()
+        if exporter:
+            exporter.finish(self.differences)
+        
+        logger.info(f"Profile comparison complete. Overall difference score: {self.differences['overall_diff_score']:.4f}")
+        return True
+    
+    def get_table_profiles(self, conn, db_path, table_name, columns, store=None):
+        """Get column profiles of a table, from the profile store when still valid."""
+        if store:
+            fingerprint = ProfileStore.fingerprint(conn, db_path, table_name)
+            profiles = store.load(db_path, table_name, fingerprint)
+            if profiles is not None and set(profiles) == set(columns):
+                logger.debug(f"Reusing saved profile for table {table_name} of {db_path}")
+                return profiles
+        
+        profiles = profile_table(conn, table_name, columns)
+        if store:
+            store.save(db_path, table_name, fingerprint, profiles)
+        return profiles
+    
+    def get_ordered_index(self, conn, table_name, columns):
+        """Find a key to read a table in order by and match its rows on.
+        
+        A rowid alias (INTEGER PRIMARY KEY column) is the table's own order
+        and is preferred. Otherwise only complete (non-partial) unique indexes
+        (primary key, UNIQUE constraint or CREATE UNIQUE INDEX) whose key
+        columns are plain, BINARY-collated, NOT NULL and all among ``columns``
+        are considered, preferring a covering one, then the primary key, then
+        any other. Non-unique indexes are never used: matching on a whole row
+        would turn every changed cell into a missing row. Returns None or a
+        dict with the index ``name`` ("rowid" for a rowid alias) and the
+        ``match_columns`` rows are ordered and matched by.
+        """
+        table = self.quote_identifier(table_name)
+        table_info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        notnull = {row[1]: row[3] for row in table_info}
+        # WITHOUT ROWID tables enforce NOT NULL on their primary key even when not declared
+        without_rowid = not self.has_rowid(conn, table_name)
+        
+        pk_columns = [row for row in table_info if row[5]]
+        if (not without_rowid and len(pk_columns) == 1 and pk_columns[0][2].upper() == "INTEGER"
+                and pk_columns[0][1] in columns):
+            logger.debug(f"Using rowid alias {pk_columns[0][1]} for ordered reads of table {table_name}")
+            return {"name": "rowid", "match_columns": [pk_columns[0][1]]}
+        
+        candidates = []
+        for index_name, unique, origin, partial in conn.execute(
+                'SELECT name, "unique", origin, partial FROM pragma_index_list(?)', (table_name,)):
+            if partial or not unique:
+                continue
+            info = conn.execute(
+                "SELECT cid, name, coll, key FROM pragma_index_xinfo(?) ORDER BY seqno", (index_name,)
+            ).fetchall()
+            key_info = [(cid, name, coll) for cid, name, coll, key in info if key]
+            if any(cid < 0 or coll != "BINARY" or name not in columns for cid, name, coll in key_info):
+                continue
+            key_columns = [name for _, name, _ in key_info]
+            if not (all(notnull.get(col) for col in key_columns) or (origin == "pk" and without_rowid)):
+                continue
+            indexed_columns = {name for cid, name, _, _ in info if cid >= 0}
+            
+            if set(columns) <= indexed_columns:
+                rank = 0
+            elif origin == "pk":
+                rank = 1
+            else:
+                rank = 2
+            candidates.append((rank, index_name, {"name": index_name, "match_columns": key_columns}))
+        
+        if not candidates:
+            return None
+        index = min(candidates)[2]
+        logger.debug(f"Using index {index['name']} for ordered reads of table {table_name}")
+        return index
+    
+    def get_match_key(self, table_name, columns):
+        """Find the key every engine matches a table's rows of both databases on.
+        
+        This is the key of ``get_ordered_index`` in database 1, or else the
+        rowid when both sides have one. Returns None when rows can only be
+        compared by position, otherwise a dict like ``get_ordered_index``.
+        """
+        index = self.get_ordered_index(self.db1_conn, table_name, columns)
+        if index is None and all(self._has_plain_rowid(conn, table_name) for conn in (self.db1_conn, self.db2_conn)):
+            index = {"name": "rowid", "match_columns": ["rowid"]}
+        return index
+    
+    def explain_query_plan(self, conn, query):
+        """Return SQLite's query plan for a query as one line of text."""
+        return "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+    
+    def has_rowid(self, conn, table_name):
+        """Check whether a table has a rowid (i.e. is not a WITHOUT ROWID table)."""
+        try:
+            conn.execute(f"SELECT rowid FROM {self.quote_identifier(table_name)} LIMIT 0")
+            return True
+        except sqlite3.OperationalError:
+            return False
+    
+    def _has_plain_rowid(self, conn, table_name):
+        """Check whether "rowid" selects a table's rowid (not a column of that name)."""
+        table = self.quote_identifier(table_name)
+        columns = {row[1].lower() for row in conn.execute(f"PRAGMA table_info({table})")}
+        return "rowid" not in columns and self.has_rowid(conn, table_name)
+    
+    def get_row_count(self, conn, table_name):
+        """Get the number of rows in a table."""
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {self.quote_identifier(table_name)}")
+        return cursor.fetchone()[0]
+    
+    def sample_content_difference(self, table_name, columns, strata=PROGRESSIVE_SAMPLE_STRATA,
+                                  rows_per_stratum=PROGRESSIVE_ROWS_PER_STRATUM, counters=None):
+        """Compare a random sample of rows from both databases.
+        
+        The rowid range of database 1 is split into equal strata, and random
+        rowids are drawn in each; the rows that exist form the sample. Every
+        row has the same chance to be drawn, so the sample is unbiased; sparse
+        rowids get up to ROWID_SAMPLE_PASSES rounds of draws. WITHOUT
+        ROWID tables draw random row numbers per stratum of their key order.
+        Like the engines, each sampled row is compared with the row of
+        database 2 that has the same match key (see ``get_match_key``), and
+        counts as entirely different without one. Tables without a key are
+        compared by position, drawing the same row numbers on both sides.
+        Mismatches are also recorded in ``counters`` (a MismatchCounters) if given.
+        Returns a tuple of (cells_different, cells_sampled); ``content_interval``
+        turns it into an interval over the sampled rows.
+        """
+        if not columns:
+            return 0, 0
+        
+        index = self.get_match_key(table_name, columns)
+        key_columns = index["match_columns"] if index else []
+        column_list = ", ".join(self.quote_identifier(col) for col in key_columns + list(columns))
+        table = self.quote_identifier(table_name)
+        rng = random.Random(SAMPLE_SEED)
+        
+        if index and self.has_rowid(self.db1_conn, table_name):
+            min_rowid, max_rowid = self.db1_conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+            if min_rowid is None:
+                return 0, 0
+            query = (f"SELECT rowid, {column_list} FROM {table} "
+                     f"WHERE rowid IN (SELECT value FROM json_each(?)) ORDER BY rowid")
+            sampled = {}
+            draws_per_stratum = rows_per_stratum
+            for _ in range(ROWID_SAMPLE_PASSES):
+                draws = self._stratified_draws(rng, min_rowid, max_rowid + 1, strata, draws_per_stratum)
+                hits = 0
+                for row in self.db1_conn.execute(query, (json.dumps(draws),)):
+                    sampled[row[0]] = row[1:]
+                    hits += 1
+                missing = strata * rows_per_stratum - len(sampled)
+                if missing <= 0 or len(draws) > max_rowid - min_rowid:
+                    # Enough rows, or every rowid has been drawn
+                    break
+                # Draw more where rowids are sparse; each pass gives every row the same chance
+                draws_per_stratum = min(-(-missing * len(draws) // (max(hits, 1) * strata)),
+                                        rows_per_stratum * ROWID_SAMPLE_MAX_DRAW_FACTOR)
+            positions = sorted(sampled)
+            rows1 = [sampled[position] for position in positions]
+            unit = "rowid"
+        else:
+            count = self.get_row_count(self.db1_conn, table_name)
+            positions = self._stratified_draws(rng, 0, count, strata, rows_per_stratum)
+            rows1 = self._fetch_row_numbers(self.db1_conn, table_name, column_list, key_columns, positions)
+            unit = "row"
+        if counters is not None:
+            counters.unit = unit
+        
+        if index:
+            rows2 = self._lookup_rows(self.db2_conn, table_name, key_columns, columns, rows1)
+        else:
+            # Rows missing from database 2 are not compared, like in the streaming engine
+            rows2 = self._fetch_row_numbers(self.db2_conn, table_name, column_list, key_columns, positions)
+            rows2 += [()] * (len(rows1) - len(rows2))
+        
+        key_length = len(key_columns)
+        cells_different = 0
+        for position, row1, row2 in zip(positions, rows1, rows2):
+            if row2 is None:
+                different = range(len(columns))
+            else:
+                different = [i for i, (val1, val2) in enumerate(zip(row1[key_length:], row2[key_length:]))
+                             if val1 != val2]
+            cells_different += len(different)
+            if counters is not None:
+                counters.add_row(position, different)
+        cells_sampled = len(rows1) * len(columns)
+        
+        logger.debug(f"Sampled {cells_sampled} cells from table {table_name}, {cells_different} different")
+        return cells_different, cells_sampled
+    
+    @staticmethod
+    def _stratified_draws(rng, low, high, strata, per_stratum):
+        """Draw distinct random values from [low, high), spread evenly over equal strata.
+        
+        Each stratum gets draws in proportion to its width, so every value has
+        the same chance to be drawn. Returns the draws in ascending order.
+        """
+        total = high - low
+        if total <= 0:
+            return []
+        width = -(-total // strata)
+        per_stratum = min(per_stratum, width)
+        draws = []
+        for start in range(low, high, width):
+            end = min(start + width, high)
+            draws.extend(rng.sample(range(start, end), round(per_stratum * (end - start) / width)))
+        return sorted(draws)
+    
+    def _fetch_row_numbers(self, conn, table_name, column_list, key_columns, positions):
+        """Fetch the rows at the given 0-based row numbers, in key order if there is a key, else rowid order."""
+        if self.has_rowid(conn, table_name) and not key_columns:
+            order = "rowid"
+        else:
+            order = ", ".join(self.quote_identifier(col) for col in key_columns)
+        window = f"row_number() OVER ({'ORDER BY ' + order if order else ''}) - 1"
+        query = (f"SELECT * FROM (SELECT {window} AS sample_position__, {column_list} "
+                 f"FROM {self.quote_identifier(table_name)}) "
+                 f"WHERE sample_position__ IN (SELECT value FROM json_each(?)) ORDER BY sample_position__")
+        return [row[1:] for row in conn.execute(query, (json.dumps(positions),))]
+    
+    def _lookup_rows(self, conn, table_name, key_columns, columns, rows):
+        """Find the row with the same key for each of ``rows`` (key values first), or None.
+        
+        Rows are looked up with one query; returned rows hold the key values
+        followed by ``columns``, like ``rows``.
+        """
+        if not rows:
+            return []
+        key_length = len(key_columns)
+        key_list = ", ".join(self.quote_identifier(col) for col in key_columns)
+        column_list = ", ".join(self.quote_identifier(col) for col in key_columns + list(columns))
+        values = ", ".join("(" + ", ".join("?" * key_length) + ")" for _ in rows)
+        query = (f"SELECT {column_list} FROM {self.quote_identifier(table_name)} "
+                 f"WHERE ({key_list}) IN (VALUES {values})")
+        found = {}
+        for row in conn.execute(query, [value for row in rows for value in row[:key_length]]):
+            found.setdefault(tuple(sqlite_sort_key(value) for value in row[:key_length]), row)
+        return [found.get(tuple(sqlite_sort_key(value) for value in row[:key_length])) for row in rows]
+    
+    @staticmethod
+    def estimate_proportion_interval(successes, trials, z=1.96):
+        """Return the Wilson score interval (low, high) for a sampled proportion."""
+        return proportion_interval(successes, trials, z)
+    
+    @staticmethod
+    def quote_identifier(name):
+        """Quote a table or column name for use in SQL."""
+        return '"' + name.replace('"', '""') + '"'
+    
+    def _refine_by_ranges(self, table_name, details, row_counts, engine, out_of_time, on_range):
+        """Compare a table with an engine's ``iter_ranges``, one range or batch at a time.
+        
+        After each range the table's estimate combines the exact counts of the
+        ranges compared so far with its content interval for the rest, and
+        ``on_range`` is called. Stops early once ``out_of_time()`` is true.
+        Returns True if the whole table was compared, False if it stopped early
+        or the comparison failed (the table then keeps its estimate).
+        """
+        columns = details["common_columns"]
+        count1, count2 = row_counts
+        total_cells = count1 * len(columns)
+        prior_low, prior_high = details["data_details"].get("content_diff_interval", (0.0, 1.0))
+        ranges = get_engine(engine).iter_ranges(self, table_name, columns, row_counts)
+        try:
+            for counters, rows_compared, result in ranges:
+                if result is not None:
+                    data_diff, data_details = result
+                    data_details.setdefault("engine", engine)
+                    self._set_engine_data_difference(details, data_diff, data_details)
+                    return True
+                cells_different = sum(counters.column_mismatches)
+                remaining_cells = max(0, count1 - rows_compared) * len(columns)
+                self._set_estimated_data_difference(
+                    details, count1, count2,
+                    (cells_different + remaining_cells * prior_low) / total_cells,
+                    (cells_different + remaining_cells * prior_high) / total_cells
+                )
+                on_range()
+                if out_of_time():
+                    return False
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Range comparison of table {table_name} failed ({e})")
+        finally:
+            ranges.close()
+        return False
+    
+    @staticmethod
+    def _set_engine_data_difference(details, data_diff, data_details):
+        """Store a table's data difference as returned by an engine.
+        
+        The result is exact unless the engine only compared a sample of the
+        rows, in which case its content interval bounds the error.
+        """
+        low, high = data_details.get("content_diff_interval", (0.0, 0.0))
+        details.update({
+            "data_diff_score": data_diff,
+            "data_details": data_details,
+            "data_diff_error_bound": (high - low) / 4,
+            "exact": "content_diff_interval" not in data_details
+        })
+    
+    def _set_estimated_data_difference(self, details, count1, count2, content_low, content_high):
+        """Store an estimated data difference for a table from its row counts and a content interval.
+        
+        Row counts of None mean the table has not been counted yet, which
+        leaves the row count difference unknown as well.
+        """
+        if count1 is None:
+            row_count_diff = None
+            row_low, row_high = 0.0, 1.0
+        else:
+            max_rows = max(count1, count2)
+            row_count_diff = abs(count1 - count2)
+            row_low = row_high = row_count_diff / max_rows if max_rows > 0 else 0
+        exact = False
+        
+        if not details["common_columns"]:
+            data_diff = 1.0
+            data_details = {"row_count_diff": row_count_diff, "no_common_columns": True}
+            # The score does not depend on the row counts
+            error_bound = 0.0
+            exact = count1 is not None
+        else:
+            if count1 == 0 or count2 == 0:
+                # Matches calculate_table_data_difference: an empty side is completely different
+                content_low = content_high = 1.0
+                exact = True
+            content_diff_score = (content_low + content_high) / 2
+            row_diff_score = (row_low + row_high) / 2
+            data_diff = (row_diff_score + content_diff_score) / 2
+            data_details = {
+                "row_count_diff": row_count_diff,
+                "content_diff_score": content_diff_score,
+                "row_diff_score": row_diff_score
+            }
+            error_bound = 0.0 if exact else (row_high - row_low + content_high - content_low) / 4
+            if not exact:
+                data_details["content_diff_interval"] = (content_low, content_high)
+        
+        details.update({
+            "data_diff_score": data_diff,
+            "data_details": data_details,
+            "data_diff_error_bound": error_bound,
+            "exact": exact
+        })
+    
+    def _init_differences(self, selected_tables=None):
+        """Reset self.differences with table presence information and return the common tables."""
         # Get tables from both databases
         tables_db1 = set(self.get_table_list(self.db1_conn))
         tables_db2 = set(self.get_table_list(self.db2_conn))
@@ -227,43 +807,21 @@ class SQLiteComparer:
             },
             "table_details": {}
         }
-        
-        # Compare structure and content of common tables
-        total_structure_diff = 0
-        total_data_diff = 0
-        
-        for table in common_tables:
-            logger.info(f"Comparing table: {table}")
-            
-            # Compare structure
-            structure1 = self.get_table_structure(self.db1_conn, table)
-            structure2 = self.get_table_structure(self.db2_conn, table)
-            
-            structure_diff, structure_details = self.calculate_table_structure_difference(structure1, structure2)
-            
-            # Compare data
-            df1 = self.get_table_data(self.db1_conn, table)
-            df2 = self.get_table_data(self.db2_conn, table)
-            
-            data_diff, data_details = self.calculate_table_data_difference(df1, df2)
-            
-            total_structure_diff += structure_diff
-            total_data_diff += data_diff
-            
-            self.differences["table_details"][table] = {
-                "structure_diff_score": structure_diff,
-                "structure_details": structure_details,
-                "data_diff_score": data_diff,
-                "data_details": data_details
-            }
+        return common_tables
+    
+    def _update_overall_scores(self):
+        """Recalculate the overall difference and similarity scores from the table details."""
+        table_details = self.differences["table_details"]
         
         # Calculate overall differences
-        if common_tables:
-            avg_structure_diff = total_structure_diff / len(common_tables)
-            avg_data_diff = total_data_diff / len(common_tables)
+        if table_details:
+            avg_structure_diff = sum(d["structure_diff_score"] for d in table_details.values()) / len(table_details)
+            avg_data_diff = sum(d["data_diff_score"] for d in table_details.values()) / len(table_details)
+            avg_error_bound = sum(d.get("data_diff_error_bound", 0.0) for d in table_details.values()) / len(table_details)
         else:
             avg_structure_diff = 1.0
             avg_data_diff = 1.0
+            avg_error_bound = 0.0
         
         table_presence_diff = self.differences["table_differences"]["table_presence_diff_score"]
         
@@ -273,8 +831,6 @@ class SQLiteComparer:
             0.3 * avg_structure_diff + 
             0.4 * avg_data_diff
         )
+        self.differences["overall_error_bound"] = 0.4 * avg_error_bound
         
         self.similarity_score = 1 - self.differences["overall_diff_score"]
-        
-        logger.info(f"Comparison complete. Overall difference score: {self.differences['overall_diff_score']:.4f}")
-        return True
\ No newline at end of file
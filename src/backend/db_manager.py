@@ -23,4 +23,10 @@ def setup_logging():
     
     # Create a logger for this module
     logger = logging.getLogger(__name__)
-    logger.info("Logging configured.")
\ No newline at end of file
+    logger.info("Logging configured.")
+
+def get_profile_dir():
+    """Return the directory where column profiles are kept between runs."""
+    profile_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles')
+    os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
\ No newline at end of file
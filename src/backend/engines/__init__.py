@@ -0,0 +1,204 @@
+# backend/engines/__init__.py
+# Registry of table data comparison engines. Engine modules are imported the
+# first time they are used, so e.g. pandas is only loaded when the vectorized
+# engine actually runs.
+#
+# An engine module defines NAME and
+#     compare_table(comparer, table_name, columns, row_counts) -> (data_diff, data_details)
+# with the same result format as the vectorized engine. Engines that only look
+# at a sample of the rows add ``content_diff_interval`` (low, high) to the
+# details, so the result is known to be an estimate.
+#
+# Engines that can stop part way through a table also define
+#     iter_ranges(comparer, table_name, columns, row_counts)
+# yielding (counters, rows_compared, None) after each range or batch of rows of
+# database 1, and finally (counters, rows_compared, (data_diff, data_details)).
+# Progressive comparisons use it to check their time budget within a table.
+import importlib
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Engine name -> module implementing it
+ENGINE_MODULES = {
+    "sql": "backend.engines.sql_engine",
+    "streaming": "backend.engines.streaming_engine",
+    "vectorized": "backend.engines.vectorized_engine",
+    "sampling": "backend.engines.sampling_engine"
+}
+
+# Automatic selection thresholds (rows in the larger side of a table)
+STREAMING_MAX_ROWS = 2000
+VECTORIZED_MAX_ROWS = 10000
+SAMPLING_MIN_ROWS = 50000000
+
+# Maximum number of row ranges in a table's mismatch histogram
+RANGE_BUCKETS = 32
+
+_loaded_engines = {}
+
+
+def register_engine(name, module_path):
+    """Register an additional engine module under a name."""
+    ENGINE_MODULES[name] = module_path
+    _loaded_engines.pop(name, None)
+
+
+def get_engine(name):
+    """Return the engine module for a name, importing it on first use."""
+    if name not in _loaded_engines:
+        if name not in ENGINE_MODULES:
+            raise ValueError(f"Unknown comparison engine: {name}")
+        logger.debug(f"Loading comparison engine: {name}")
+        _loaded_engines[name] = importlib.import_module(ENGINE_MODULES[name])
+    return _loaded_engines[name]
+
+
+def select_engine(row_counts, has_key):
+    """Pick an engine for a table from its row counts and whether it has a match key.
+
+    Small tables are streamed in Python (no import cost). Medium ones with
+    equal row counts use the vectorized engine (which samples when the counts
+    differ), and large ones with a key are joined on it inside SQLite. Huge
+    tables without a key are sampled.
+    """
+    rows = max(row_counts)
+    if rows <= STREAMING_MAX_ROWS:
+        return "streaming"
+    if rows <= VECTORIZED_MAX_ROWS and row_counts[0] == row_counts[1]:
+        return "vectorized"
+    if has_key:
+        return "sql"
+    if rows >= SAMPLING_MIN_ROWS:
+        return "sampling"
+    return "streaming"
+
+
+def data_difference(rows1, rows2, cells_different, total_cells):
+    """Build the (data_diff, data_details) result from cell mismatch counts.
+
+    Follows the vectorized engine: an empty side makes the content completely
+    different, and the result averages row count and content differences.
+    """
+    max_rows = max(rows1, rows2)
+    row_count_diff = abs(rows1 - rows2)
+    row_diff_score = row_count_diff / max_rows if max_rows > 0 else 0
+
+    if rows1 > 0 and rows2 > 0:
+        content_diff_score = cells_different / total_cells if total_cells > 0 else 0
+    else:
+        content_diff_score = 1.0
+
+    overall_diff = (row_diff_score + content_diff_score) / 2
+    return overall_diff, {
+        "row_count_diff": row_count_diff,
+        "content_diff_score": content_diff_score,
+        "row_diff_score": row_diff_score
+    }
+
+
+def proportion_interval(successes, trials, z=1.96):
+    """Return the Wilson score interval (low, high) for a sampled proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def content_interval(cells_different, cells_sampled, column_count, population=None, z=1.96):
+    """Return an interval (low, high) for a content difference estimated from sampled rows.
+
+    Rows are the sampled units, not cells: cells of one row tend to differ
+    together, so treating them as independent draws would make the interval
+    far too narrow. The Wilson interval is taken over rows with each row
+    contributing its share of differing cells; that share lies in [0, 1], so
+    its variance is at most that of a yes/no outcome with the same mean. If
+    the sample holds all ``population`` rows, the estimate is exact.
+    """
+    rows = cells_sampled / column_count if column_count else 0
+    if population is not None and rows >= population:
+        share = cells_different / cells_sampled if cells_sampled else 0.0
+        return share, share
+    return proportion_interval(cells_different / column_count if column_count else 0, rows, z)
+
+
+class MismatchCounters:
+    """Per-column and per-range mismatch counts collected while a table is compared.
+
+    Positions are rowids or row numbers (``unit``). Ranges start with a bucket
+    width of ``width`` and double it, merging neighbouring buckets, whenever
+    more than ``max_buckets`` would be needed, so no row count is required up
+    front. Each range remembers the match key of its first mismatching row
+    when one is given.
+    """
+
+    def __init__(self, columns, unit="row", origin=0, width=1, max_buckets=RANGE_BUCKETS):
+        self.columns = list(columns)
+        self.column_mismatches = [0] * len(self.columns)
+        self.unit = unit
+        self.origin = origin
+        self.width = width
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.first_keys = {}
+
+    def _add_to_range(self, position, count, key=None):
+        bucket = max(0, position - self.origin) // self.width
+        while bucket >= self.max_buckets:
+            self._coarsen()
+            bucket //= 2
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        if key is not None and bucket not in self.first_keys:
+            self.first_keys[bucket] = key
+
+    def _coarsen(self):
+        """Double the bucket width, merging pairs of buckets."""
+        buckets = {}
+        first_keys = {}
+        for bucket in sorted(self.buckets):
+            buckets[bucket // 2] = buckets.get(bucket // 2, 0) + self.buckets[bucket]
+            if bucket in self.first_keys and bucket // 2 not in first_keys:
+                first_keys[bucket // 2] = self.first_keys[bucket]
+        self.buckets = buckets
+        self.first_keys = first_keys
+        self.width *= 2
+
+    def add_row(self, position, different_columns, key=None):
+        """Record the indexes of the columns that differ in one compared row."""
+        if not different_columns:
+            return
+        for i in different_columns:
+            self.column_mismatches[i] += 1
+        self._add_to_range(position, len(different_columns), key)
+
+    def add_unmatched_row(self, position, key=None):
+        """Record a row of database 1 with no counterpart in database 2 (all columns differ)."""
+        self.add_row(position, range(len(self.columns)), key)
+
+    def add_range(self, position, column_counts):
+        """Record aggregated mismatch counts per column for the range starting at ``position``."""
+        total = 0
+        for i, count in enumerate(column_counts):
+            self.column_mismatches[i] += count
+            total += count
+        if total:
+            self._add_to_range(position, total)
+
+    def to_details(self):
+        """Return the counters as data_details entries."""
+        return {
+            "column_mismatches": dict(zip(self.columns, self.column_mismatches)),
+            "range_mismatches": {
+                "unit": self.unit,
+                "ranges": [{
+                    "start": self.origin + bucket * self.width,
+                    "end": self.origin + (bucket + 1) * self.width - 1,
+                    "mismatches": self.buckets[bucket],
+                    "first_key": self.first_keys.get(bucket)
+                } for bucket in sorted(self.buckets)]
+            }
+        }
@@ -0,0 +1,28 @@
+# backend/engines/sampling_engine.py
+# Sampling engine: estimates the content difference from stratified random row samples.
+import logging
+from backend.engines import MismatchCounters, content_interval, data_difference
+
+logger = logging.getLogger(__name__)
+
+NAME = "sampling"
+
+# Larger than the progressive comparison's quick estimate, since this is the final result
+SAMPLE_STRATA = 50
+ROWS_PER_STRATUM = 200
+
+
+def compare_table(comparer, table_name, columns, row_counts):
+    """Estimate the data difference of a table from a stratified sample of rows."""
+    # Counts cover the sampled rows only
+    counters = MismatchCounters(columns)
+    cells_different, cells_sampled = comparer.sample_content_difference(
+        table_name, columns, SAMPLE_STRATA, ROWS_PER_STRATUM, counters
+    )
+    rows1, rows2 = row_counts
+    low, high = content_interval(cells_different, cells_sampled, len(columns), rows1)
+    data_diff, data_details = data_difference(rows1, rows2, cells_different, cells_sampled)
+    data_details.update(counters.to_details())
+    data_details["sampled_cells"] = cells_sampled
+    data_details["content_diff_interval"] = (low, high)
+    return data_diff, data_details
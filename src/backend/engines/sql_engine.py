@@ -0,0 +1,146 @@
+# backend/engines/sql_engine.py
+# Pure-SQL engine: attaches database 2 to database 1 and counts differing cells
+# inside SQLite, joining the two tables on their match key.
+import sqlite3
+import logging
+from backend.engines import RANGE_BUCKETS, MismatchCounters, data_difference, get_engine
+
+logger = logging.getLogger(__name__)
+
+NAME = "sql"
+
+# Schema name database 2 is attached under while a table is compared
+ATTACH_ALIAS = "compare_db2"
+
+# Whether two cells differ, like the Python engines' != : values must have the same
+# type (integers and reals compare by value) and text is compared byte for byte,
+# whatever the columns' affinity and collation
+CELL_DIFFERS = ("(a.{col} IS NOT b.{col} COLLATE BINARY OR (typeof(a.{col}) <> typeof(b.{col}) "
+                "AND NOT (typeof(a.{col}) IN ('integer', 'real') AND typeof(b.{col}) IN ('integer', 'real'))))")
+
+
+def _compare_streaming(comparer, table_name, columns, row_counts):
+    """Fall back to the streaming engine, recording that it was used."""
+    data_diff, data_details = get_engine("streaming").compare_table(comparer, table_name, columns, row_counts)
+    data_details["engine"] = "streaming"
+    return data_diff, data_details
+
+
+def iter_ranges(comparer, table_name, columns, row_counts):
+    """Compare a table one range of database 1 at a time.
+
+    Rows are joined on the table's match key (see
+    SQLiteComparer.get_match_key). Database 1 is split into rowid ranges, or
+    into ranges of its key order for WITHOUT ROWID tables, each compared with
+    one join query that also counts mismatches per column. Rows of database 1
+    without a matching key in database 2 count as entirely different.
+    After each range, yields a tuple (counters, rows_compared, None) with the
+    MismatchCounters so far and the number of rows of database 1 covered; the
+    last tuple carries the table's (data_diff, data_details) result instead of
+    None. Database 2 stays attached until the generator is exhausted or
+    closed. Raises sqlite3.Error if it cannot be attached, or ValueError if
+    the table has no match key.
+    """
+    index = comparer.get_match_key(table_name, columns)
+    if index is None:
+        raise ValueError(f"table {table_name} has no key to join on")
+    conn = comparer.db1_conn
+    table = comparer.quote_identifier(table_name)
+    key = [comparer.quote_identifier(col) for col in index["match_columns"]]
+    mismatches = ", ".join(
+        f"TOTAL(CASE WHEN b.{key[0]} IS NULL THEN 1 ELSE {CELL_DIFFERS.format(col=col)} END)"
+        for col in (comparer.quote_identifier(c) for c in columns)
+    )
+    join = " AND ".join(f"a.{col} = b.{col}" for col in key)
+    conn.execute("ATTACH DATABASE ? AS " + ATTACH_ALIAS, (comparer.db2_path,))
+    try:
+        query = (f"SELECT COUNT(*), {mismatches} FROM main.{table} AS a "
+                 f"LEFT JOIN {ATTACH_ALIAS}.{table} AS b ON {join}")
+        if comparer.has_rowid(conn, table_name):
+            min_rowid, max_rowid = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM main.{table}").fetchone()
+            width = -(-(max_rowid - min_rowid + 1) // RANGE_BUCKETS) if min_rowid is not None else 1
+            counters = MismatchCounters(columns, unit="rowid", origin=min_rowid or 0, width=width)
+            ranges = _rowid_ranges(query, min_rowid, max_rowid, width)
+        else:
+            width = max(1, -(-row_counts[0] // RANGE_BUCKETS))
+            counters = MismatchCounters(columns, width=width)
+            ranges = _key_ranges(conn, table, query, key, width)
+        plan = comparer.explain_query_plan(conn, query)
+        rows_compared = 0
+        for range_query, params, start in ranges:
+            rows, *column_counts = conn.execute(range_query, params).fetchone()
+            counters.add_range(start, [int(count) for count in column_counts])
+            rows_compared += rows
+            yield counters, rows_compared, None
+        yield counters, rows_compared, table_result(table_name, columns, row_counts, counters, plan, index["name"])
+    finally:
+        conn.execute("DETACH DATABASE " + ATTACH_ALIAS)
+
+
+def _rowid_ranges(query, min_rowid, max_rowid, width):
+    """Yield (query, params, start) for the rowid ranges of database 1."""
+    if min_rowid is None:
+        return
+    query += " WHERE a.rowid BETWEEN ? AND ?"
+    # One range seek per bucket: a single pass without sorting for GROUP BY
+    for start in range(min_rowid, max_rowid + 1, width):
+        yield query, (start, start + width - 1), start
+
+
+def _key_ranges(conn, table, query, key, width):
+    """Yield (query, params, start) for ranges of ``width`` rows of database 1 in key order.
+
+    The upper bound of each range is found by skipping ``width`` keys from
+    the previous bound; ``start`` is the row number the range begins at.
+    """
+    key_list = ", ".join(key)
+    a_key = "(" + ", ".join(f"a.{col}" for col in key) + ")"
+    placeholders = "(" + ", ".join("?" * len(key)) + ")"
+    lower = None
+    start = 0
+    while True:
+        bound_query = f"SELECT {key_list} FROM main.{table}"
+        if lower is not None:
+            bound_query += f" WHERE ({key_list}) > {placeholders}"
+        bound_query += f" ORDER BY {key_list} LIMIT 1 OFFSET {width - 1}"
+        upper = conn.execute(bound_query, lower or ()).fetchone()
+        conditions = []
+        params = ()
+        if lower is not None:
+            conditions.append(f"{a_key} > {placeholders}")
+            params += tuple(lower)
+        if upper is not None:
+            conditions.append(f"{a_key} <= {placeholders}")
+            params += tuple(upper)
+        yield query + (" WHERE " + " AND ".join(conditions) if conditions else ""), params, start
+        if upper is None:
+            return
+        lower = upper
+        start += width
+
+
+def table_result(table_name, columns, row_counts, counters, plan, index_name):
+    """Build the (data_diff, data_details) result of a fully compared table."""
+    rows1, rows2 = row_counts
+    cells_different = sum(counters.column_mismatches)
+    logger.debug(f"SQL comparison of table {table_name}: {cells_different} cells different")
+    data_diff, data_details = data_difference(rows1, rows2, cells_different, rows1 * len(columns))
+    data_details.update(counters.to_details())
+    # One join query reads both sides
+    data_details["access_path"] = {"index": index_name, "match": "key", "db1": plan, "db2": plan}
+    return data_diff, data_details
+
+
+def compare_table(comparer, table_name, columns, row_counts):
+    """Compare the data of a table with key join queries, range by range.
+
+    Falls back to the streaming engine if database 2 cannot be attached or the
+    table has no match key.
+    """
+    try:
+        for _, _, result in iter_ranges(comparer, table_name, columns, row_counts):
+            pass
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning(f"SQL comparison of table {table_name} failed ({e}), using streaming engine")
+        return _compare_streaming(comparer, table_name, columns, row_counts)
+    return result
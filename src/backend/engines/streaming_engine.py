@@ -0,0 +1,164 @@
+# backend/engines/streaming_engine.py
+# Streaming engine: reads both tables in batches and compares them in Python.
+# When the table has a match key (see SQLiteComparer.get_match_key), both sides
+# are read in key order and merged on it; otherwise rows are compared by position.
+import logging
+from itertools import zip_longest
+from backend.column_profile import sqlite_sort_key
+from backend.engines import MismatchCounters, data_difference
+
+logger = logging.getLogger(__name__)
+
+NAME = "streaming"
+
+# Rows fetched from SQLite per batch
+BATCH_SIZE = 5000
+
+
+def _build_query(comparer, conn, table_name, columns, index):
+    """Build the ordered SELECT for one side.
+
+    With a match key the key columns are selected before ``columns`` and rows
+    come in key order; otherwise only ``columns`` are selected, in rowid order.
+    """
+    key_columns = index["match_columns"] if index else []
+    column_list = ", ".join(comparer.quote_identifier(col) for col in key_columns + list(columns))
+    query = f"SELECT {column_list} FROM {comparer.quote_identifier(table_name)}"
+    if index:
+        query += " ORDER BY " + ", ".join(f"{comparer.quote_identifier(col)} COLLATE BINARY" for col in key_columns)
+    elif comparer.has_rowid(conn, table_name):
+        query += " ORDER BY rowid"
+    return query
+
+
+def _iter_rows(conn, query):
+    """Yield the rows of a query, fetched in batches."""
+    cursor = conn.cursor()
+    cursor.arraysize = BATCH_SIZE
+    cursor.execute(query)
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            return
+        yield from batch
+
+
+def _different_columns(row1, row2):
+    """Indexes of the columns whose values differ between two rows."""
+    return [i for i, (val1, val2) in enumerate(zip(row1, row2)) if val1 != val2]
+
+
+def _compare_by_position(rows_db1, rows_db2, counters):
+    """Compare two row streams position by position.
+
+    Yields the running (rows1, rows2, cells_different) after every BATCH_SIZE
+    rows of database 1 and once more at the end.
+    """
+    rows1 = 0
+    rows2 = 0
+    cells_different = 0
+    for row1, row2 in zip_longest(rows_db1, rows_db2):
+        if row1 is not None and row2 is not None:
+            different = _different_columns(row1, row2)
+            if different:
+                cells_different += len(different)
+                counters.add_row(rows1, different)
+        if row1 is not None:
+            rows1 += 1
+            if rows1 % BATCH_SIZE == 0:
+                yield rows1, rows2, cells_different
+        if row2 is not None:
+            rows2 += 1
+    yield rows1, rows2, cells_different
+
+
+def _compare_by_merge(rows_db1, rows_db2, key_length, counters):
+    """Merge two row streams sorted on the match key, which leads each row.
+
+    Rows with equal keys are compared cell by cell (the key itself excluded);
+    rows of database 1 without a match count as entirely different. Yields
+    the running (rows1, rows2, cells_different) like _compare_by_position.
+    """
+    def match_key(row):
+        return tuple(sqlite_sort_key(value) for value in row[:key_length])
+
+    def key_label(row):
+        return ", ".join(repr(value) for value in row[:key_length])
+
+    column_count = len(counters.columns)
+    rows1 = 0
+    rows2 = 0
+    cells_different = 0
+    row1 = next(rows_db1, None)
+    row2 = next(rows_db2, None)
+    key1 = match_key(row1) if row1 is not None else None
+    key2 = match_key(row2) if row2 is not None else None
+    while row1 is not None or row2 is not None:
+        if row2 is None or (row1 is not None and key1 < key2):
+            cells_different += column_count
+            counters.add_unmatched_row(rows1, key_label(row1))
+            rows1 += 1
+            row1 = next(rows_db1, None)
+            key1 = match_key(row1) if row1 is not None else None
+        elif row1 is None or key1 > key2:
+            rows2 += 1
+            row2 = next(rows_db2, None)
+            key2 = match_key(row2) if row2 is not None else None
+            continue
+        else:
+            different = _different_columns(row1[key_length:], row2[key_length:])
+            if different:
+                cells_different += len(different)
+                counters.add_row(rows1, different, key_label(row1))
+            rows1 += 1
+            rows2 += 1
+            row1 = next(rows_db1, None)
+            row2 = next(rows_db2, None)
+            key1 = match_key(row1) if row1 is not None else None
+            key2 = match_key(row2) if row2 is not None else None
+        if rows1 % BATCH_SIZE == 0:
+            yield rows1, rows2, cells_different
+    yield rows1, rows2, cells_different
+
+
+def iter_ranges(comparer, table_name, columns, row_counts):
+    """Compare a table in constant memory, one batch of rows at a time.
+
+    Both sides are merged on the table's match key when it has one, otherwise
+    compared by position. After every BATCH_SIZE rows of database 1, yields a
+    tuple (counters, rows_compared, None) with the MismatchCounters so far and
+    the number of rows of database 1 compared; the last tuple carries the
+    table's (data_diff, data_details) result instead of None.
+    """
+    index = comparer.get_match_key(table_name, columns)
+    query1 = _build_query(comparer, comparer.db1_conn, table_name, columns, index)
+    query2 = _build_query(comparer, comparer.db2_conn, table_name, columns, index)
+    rows_db1 = _iter_rows(comparer.db1_conn, query1)
+    rows_db2 = _iter_rows(comparer.db2_conn, query2)
+
+    # Ranges are row numbers in the order read from database 1
+    counters = MismatchCounters(columns)
+    if index:
+        progress = _compare_by_merge(rows_db1, rows_db2, len(index["match_columns"]), counters)
+    else:
+        progress = _compare_by_position(rows_db1, rows_db2, counters)
+    for rows1, rows2, cells_different in progress:
+        yield counters, rows1, None
+
+    logger.debug(f"Streamed {rows1}/{rows2} rows from table {table_name}, {cells_different} cells different")
+    data_diff, data_details = data_difference(rows1, rows2, cells_different, rows1 * len(columns))
+    data_details.update(counters.to_details())
+    data_details["access_path"] = {
+        "index": index["name"] if index else None,
+        "match": "key" if index else "position",
+        "db1": comparer.explain_query_plan(comparer.db1_conn, query1),
+        "db2": comparer.explain_query_plan(comparer.db2_conn, query2)
+    }
+    yield counters, rows1, (data_diff, data_details)
+
+
+def compare_table(comparer, table_name, columns, row_counts):
+    """Compare the data of a table in constant memory, merging on its match key when it has one."""
+    for _, _, result in iter_ranges(comparer, table_name, columns, row_counts):
+        pass
+    return result
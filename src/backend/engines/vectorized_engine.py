@@ -0,0 +1,292 @@
+# backend/engines/vectorized_engine.py
+# Vectorized engine: loads both tables into pandas DataFrames and compares them in memory.
+import logging
+import pandas as pd
+import numpy as np
+from backend.engines import MismatchCounters, content_interval, data_difference
+
+logger = logging.getLogger(__name__)
+
+NAME = "vectorized"
+
+# Rows compared when a table is too large to compare completely
+SAMPLE_SIZE = 10000
+
+# Text columns with at most this share of distinct values are dictionary-encoded before comparison
+DICTIONARY_ENCODING_MAX_RATIO = 0.5
+
+
+def compare_table(comparer, table_name, columns, row_counts):
+    """Compare the data of a table by loading both sides into DataFrames.
+
+    Rows are aligned on the table's match key when it has one (see
+    SQLiteComparer.get_match_key), otherwise by position.
+    """
+    index = comparer.get_match_key(table_name, columns)
+    if index:
+        key_columns = index["match_columns"]
+        selected = key_columns + [col for col in columns if col not in key_columns]
+        key_list = ", ".join(comparer.quote_identifier(col) for col in key_columns)
+        query = (f"SELECT {', '.join(comparer.quote_identifier(col) for col in selected)} "
+                 f"FROM {comparer.quote_identifier(table_name)} ORDER BY {key_list}")
+        df1 = pd.read_sql_query(query, comparer.db1_conn)
+        df2 = pd.read_sql_query(query, comparer.db2_conn)
+        data_diff, data_details = calculate_keyed_data_difference(df1, df2, key_columns, columns)
+    else:
+        df1 = get_table_data(comparer.db1_conn, table_name)
+        df2 = get_table_data(comparer.db2_conn, table_name)
+        data_diff, data_details = calculate_table_data_difference(df1, df2)
+        query = f"SELECT * FROM {table_name}"
+    data_details["access_path"] = {
+        "index": index["name"] if index else None,
+        "match": "key" if index else "position",
+        "db1": comparer.explain_query_plan(comparer.db1_conn, query),
+        "db2": comparer.explain_query_plan(comparer.db2_conn, query)
+    }
+    return data_diff, data_details
+
+
+def get_table_data(conn, table_name):
+    """Get all data from a table as a DataFrame."""
+    df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
+    logger.debug(f"Retrieved {len(df)} rows from table {table_name}")
+    return df
+
+
+def calculate_table_data_difference(df1, df2):
+    """Calculate difference between two table datasets."""
+    # If columns don't match, we'll compare what we can
+    common_columns = list(set(df1.columns) & set(df2.columns))
+    if not common_columns:
+        logger.debug("No common columns found between tables")
+        return 1.0, {"row_count_diff": abs(len(df1) - len(df2)), "no_common_columns": True}
+
+    # Mismatches per column and per range of row numbers (in database 1)
+    counters = MismatchCounters(common_columns)
+    # (cells different, cells compared) when only a random sample of rows is compared
+    sampled_cells = None
+
+    # Subset to common columns for comparison
+    df1_common = df1[common_columns].copy().reset_index(drop=True)
+    df2_common = df2[common_columns].copy().reset_index(drop=True)
+
+    # Row count difference contributes to the score
+    max_rows = max(len(df1), len(df2))
+    row_count_diff = abs(len(df1) - len(df2))
+    row_diff_score = row_count_diff / max_rows if max_rows > 0 else 0
+
+    # Try to merge them to find matching rows
+    if len(df1_common) > 0 and len(df2_common) > 0:
+        # For performance reasons on large datasets, we'll sample if very large
+        sample_size = min(SAMPLE_SIZE, len(df1_common), len(df2_common))
+        if len(df1_common) > sample_size or len(df2_common) > sample_size:
+            logger.info(f"Large dataset detected. Using sampling with size {sample_size}")
+            df1_sample = df1_common.sample(sample_size, random_state=42) if len(df1_common) > sample_size else df1_common
+            df2_sample = df2_common.sample(sample_size, random_state=42) if len(df2_common) > sample_size else df2_common
+
+            # Calculate difference based on our samples
+            cells_different = 0
+            total_cells = sample_size * len(common_columns)
+            sample_positions = df1_sample.index.to_numpy()
+
+            for col_index, col in enumerate(common_columns):
+                # Low-cardinality text is compared as integer codes
+                encoded = encode_shared_dictionary(df1_sample[col], df2_sample[col], as_text=True)
+                if encoded is not None:
+                    mismatches = code_mismatches(*encoded)
+                    cells_different += len(mismatches)
+                    _record_mismatches(counters, col_index, sample_positions[mismatches])
+                    continue
+
+                # Handle different data types
+                if df1_sample[col].dtype != df2_sample[col].dtype:
+                    try:
+                        # Try to convert to common type
+                        common_type = np.find_common_type([df1_sample[col].dtype, df2_sample[col].dtype], [])
+                        s1 = df1_sample[col].astype(str)
+                        s2 = df2_sample[col].astype(str)
+                        logger.debug(f"Converting column {col} to string for comparison due to type mismatch")
+                    except:
+                        # If conversion fails, treat as all different
+                        cells_different += sample_size
+                        _record_mismatches(counters, col_index, sample_positions)
+                        logger.warning(f"Failed to convert column {col} to common type, treating all as different")
+                        continue
+                else:
+                    s1 = df1_sample[col]
+                    s2 = df2_sample[col]
+
+                # Count differences, handling NaN values
+                # This is the key fix: Don't compare Series directly, compare values row by row
+                for i in range(len(s1)):
+                    if i < len(s2):  # Make sure we have a value to compare
+                        val1 = s1.iloc[i]
+                        val2 = s2.iloc[i]
+                        # Check if both are NaN or equal
+                        if not ((pd.isna(val1) and pd.isna(val2)) or (val1 == val2)):
+                            cells_different += 1
+                            counters.add_row(int(sample_positions[i]), [col_index])
+
+            content_diff_score = cells_different / total_cells if total_cells > 0 else 0
+            sampled_cells = (cells_different, total_cells)
+        else:
+            # For smaller datasets, we can do a more thorough comparison
+            cells_different = 0
+            total_cells = len(df1_common) * len(common_columns)
+
+            for col_index, col in enumerate(common_columns):
+                # Low-cardinality text is compared as integer codes
+                encoded = encode_shared_dictionary(df1_common[col], df2_common[col])
+                if encoded is not None:
+                    mismatches = code_mismatches(*encoded)
+                    cells_different += len(mismatches)
+                    _record_mismatches(counters, col_index, mismatches)
+                    continue
+
+                # Don't compare Series directly - compare values row by row
+                for i in range(len(df1_common)):
+                    if i < len(df2_common):  # Make sure we have a value to compare
+                        val1 = df1_common[col].iloc[i]
+                        val2 = df2_common[col].iloc[i]
+                        # Check if both are NaN or equal
+                        if not ((pd.isna(val1) and pd.isna(val2)) or (val1 == val2)):
+                            cells_different += 1
+                            counters.add_row(i, [col_index])
+
+            content_diff_score = cells_different / total_cells if total_cells > 0 else 0
+    else:
+        # If one of the dataframes is empty, they're completely different
+        content_diff_score = 1.0
+
+    # Combine row count difference and content difference
+    overall_diff = (row_diff_score + content_diff_score) / 2
+
+    logger.debug(f"Data difference score: {overall_diff}")
+    data_details = {
+        "row_count_diff": row_count_diff,
+        "content_diff_score": content_diff_score,
+        "row_diff_score": row_diff_score,
+        **counters.to_details()
+    }
+    if sampled_cells is not None:
+        # The content score is an estimate from the sample
+        data_details["sampled_cells"] = sampled_cells[1]
+        data_details["content_diff_interval"] = content_interval(*sampled_cells, len(common_columns))
+    return overall_diff, data_details
+
+
+def calculate_keyed_data_difference(df1, df2, key_columns, columns):
+    """Calculate the difference between two table datasets with rows matched on a key.
+
+    Each row of ``df1`` is compared with the row of ``df2`` that has the same
+    ``key_columns`` values (the first one if the key repeats in ``df2``); rows
+    without one count as entirely different. ``columns`` are the compared
+    columns, which may include the key columns. Both frames must hold the key
+    and ``columns``, and positions are row numbers of ``df1``.
+    """
+    counters = MismatchCounters(columns)
+    rows1 = len(df1)
+    rows2 = len(df2)
+    sample = df1.reset_index(drop=True)
+    if rows1 > SAMPLE_SIZE:
+        logger.info(f"Large dataset detected. Using sampling with size {SAMPLE_SIZE}")
+        sample = sample.sample(SAMPLE_SIZE, random_state=42)
+
+    # The df2 row of each sampled df1 row by key, all missing where there is none
+    df2 = df2.drop_duplicates(key_columns).set_index(key_columns)
+    if len(key_columns) > 1:
+        keys1 = pd.MultiIndex.from_frame(sample[key_columns])
+    else:
+        keys1 = pd.Index(sample[key_columns[0]])
+    matched = keys1.isin(df2.index)
+    aligned = df2.reindex(keys1)
+    positions = sample.index.to_numpy()
+
+    # Unmatched rows differ in every column
+    cells_different = 0
+    for position in positions[~matched]:
+        counters.add_unmatched_row(int(position))
+        cells_different += len(columns)
+    for col_index, col in enumerate(columns):
+        if col in key_columns:
+            continue
+        s1 = sample[col].to_numpy(dtype=object)
+        s2 = aligned[col].to_numpy(dtype=object)
+        equal = (pd.isna(s1) & pd.isna(s2)) | (s1 == s2)
+        mismatches = np.flatnonzero(matched & ~equal)
+        cells_different += len(mismatches)
+        _record_mismatches(counters, col_index, positions[mismatches])
+
+    cells_compared = len(sample) * len(columns)
+    data_diff, data_details = data_difference(rows1, rows2, cells_different, cells_compared)
+    data_details.update(counters.to_details())
+    if len(sample) < rows1:
+        # The content score is an estimate from the sample
+        data_details["sampled_cells"] = cells_compared
+        data_details["content_diff_interval"] = content_interval(cells_different, cells_compared, len(columns))
+    return data_diff, data_details
+
+
+def encode_shared_dictionary(s1, s2, as_text=False):
+    """Encode two low-cardinality text columns as integer codes over one shared dictionary.
+
+    Returns a tuple of code arrays (codes1, codes2), or None if neither
+    column holds text or the first one has too many distinct values. Missing
+    values get code -1 on both sides. With ``as_text``, columns of different
+    dtypes are matched by their text form like the astype(str) fallback, but
+    only the distinct and missing values are converted.
+    """
+    if not (_is_text_column(s1) or _is_text_column(s2)):
+        return None
+    if as_text and s1.dtype != s2.dtype:
+        s1 = _missing_as_text(s1)
+        s2 = _missing_as_text(s2)
+
+    codes1, uniques1 = pd.factorize(s1)
+    if len(uniques1) > DICTIONARY_ENCODING_MAX_RATIO * len(s1):
+        return None
+    codes2, uniques2 = pd.factorize(s2)
+
+    uniques1 = pd.Index(uniques1)
+    uniques2 = pd.Index(uniques2)
+    if as_text and s1.dtype != s2.dtype:
+        uniques1 = uniques1.astype(str)
+        uniques2 = uniques2.astype(str)
+
+    # Shared dictionary over the distinct values of both sides; the appended -1 maps missing values
+    shared_ids, _ = pd.factorize(uniques1.append(uniques2))
+    mapping1 = np.append(shared_ids[:len(uniques1)], -1)
+    mapping2 = np.append(shared_ids[len(uniques1):], -1)
+    logger.debug(f"Dictionary-encoded column {s1.name} with {len(uniques1)}/{len(uniques2)} distinct values")
+    return mapping1[codes1], mapping2[codes2]
+
+
+def code_mismatches(codes1, codes2):
+    """Return the positions where two code arrays differ, over their common length."""
+    length = min(len(codes1), len(codes2))
+    return np.flatnonzero(codes1[:length] != codes2[:length])
+
+
+def _record_mismatches(counters, col_index, positions):
+    """Record mismatching cells of one column at the given row numbers."""
+    for position in positions:
+        counters.add_row(int(position), [col_index])
+
+
+def _missing_as_text(series):
+    """Replace the missing values of a Series by their astype(str) text, like the fallback does.
+
+    Depending on the pandas version that text is e.g. 'None' or 'nan', which
+    then compare unequal; only the missing values are converted.
+    """
+    missing = series.isna()
+    if not missing.any():
+        return series
+    series = series.astype(object)
+    series[missing] = series[missing].astype(str)
+    return series
+
+
+def _is_text_column(series):
+    """Whether a Series holds text (object or string dtype)."""
+    return pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)
@@ -1,70 +1,175 @@
 # backend/report_generator.py
 import os
 import logging
+from backend.result_exporters import exporter_for
 
 logger = logging.getLogger(__name__)
 
+# Busiest row ranges listed per table in the detailed report
+REPORT_HOT_SPOT_RANGES = 5
+
 class ReportGenerator:
     @staticmethod
-    def generate_detailed_report(comparer):
-        """Generate a detailed text report of differences."""
-        if not hasattr(comparer, 'differences') or not comparer.differences:
+    def generate_detailed_report(comparer, differences=None):
+        """Generate a detailed text report of differences.
+        
+        ``differences`` may be a snapshot published by a progressive comparison;
+        it defaults to the comparer's current results.
+        """
+        return "\n".join(ReportGenerator.iter_detailed_report(comparer, differences))
+    
+    @staticmethod
+    def iter_detailed_report(comparer, differences=None):
+        """Yield the lines of the detailed text report one at a time."""
+        if differences is None:
+            differences = getattr(comparer, 'differences', None)
+        if not differences:
             logger.warning("No comparison data available for report generation")
-            return "No comparison has been performed yet."
+            yield "No comparison has been performed yet."
+            return
         
         logger.info("Generating detailed report")
-        report = []
-        report.append("DATABASE COMPARISON REPORT")
-        report.append("========================\n")
+        yield "DATABASE COMPARISON REPORT"
+        yield "========================\n"
         
-        report.append(f"Database 1: {os.path.basename(comparer.db1_path)}")
-        report.append(f"Database 2: {os.path.basename(comparer.db2_path)}\n")
+        yield f"Database 1: {os.path.basename(comparer.db1_path)}"
+        yield f"Database 2: {os.path.basename(comparer.db2_path)}\n"
         
-        report.append("SUMMARY:")
-        report.append(f"Overall Difference Score: {comparer.differences['overall_diff_score']:.4f} (0=identical, 1=completely different)")
-        report.append(f"Similarity Score: {comparer.similarity_score:.4f} (1=identical, 0=completely different)\n")
+        yield "SUMMARY:"
+        yield f"Overall Difference Score: {differences['overall_diff_score']:.4f} (0=identical, 1=completely different)"
+        yield f"Similarity Score: {1 - differences['overall_diff_score']:.4f} (1=identical, 0=completely different)"
+        progress = differences.get("progress")
+        if progress and not progress["exact"]:
+            yield (f"Estimate after {progress['elapsed']:.1f}s ({progress['phase']} phase): "
+                   f"± {progress['error_bound']:.4f}, {progress['tables_exact']} tables exact")
+        yield ""
         
-        report.append("TABLE PRESENCE:")
-        table_diff = comparer.differences["table_differences"]
-        report.append(f"Total Tables: {table_diff['total_tables']}")
-        report.append(f"Common Tables: {table_diff['common_tables']}")
-        report.append(f"Tables in DB2 missing from DB1: {', '.join(table_diff['missing_in_db1']) or 'None'}")
-        report.append(f"Tables in DB1 missing from DB2: {', '.join(table_diff['missing_in_db2']) or 'None'}")
-        report.append(f"Table Presence Difference Score: {table_diff['table_presence_diff_score']:.4f}\n")
+        yield "TABLE PRESENCE:"
+        table_diff = differences["table_differences"]
+        yield f"Total Tables: {table_diff['total_tables']}"
+        yield f"Common Tables: {table_diff['common_tables']}"
+        yield f"Tables in DB2 missing from DB1: {', '.join(table_diff['missing_in_db1']) or 'None'}"
+        yield f"Tables in DB1 missing from DB2: {', '.join(table_diff['missing_in_db2']) or 'None'}"
+        yield f"Table Presence Difference Score: {table_diff['table_presence_diff_score']:.4f}\n"
         
-        report.append("TABLE DETAILS:")
-        for table, details in comparer.differences["table_details"].items():
-            report.append(f"\n  Table: {table}")
-            report.append(f"  ------------------------")
-            report.append(f"  Structure Difference Score: {details['structure_diff_score']:.4f}")
-            
-            structure_details = details['structure_details']
-            if structure_details['missing_in_db1']:
-                report.append(f"  Columns in DB2 missing from DB1: {', '.join(structure_details['missing_in_db1'])}")
-            if structure_details['missing_in_db2']:
-                report.append(f"  Columns in DB1 missing from DB2: {', '.join(structure_details['missing_in_db2'])}")
-            if structure_details['type_mismatches']:
-                report.append(f"  Columns with type mismatches: {', '.join(structure_details['type_mismatches'])}")
-            
-            report.append(f"  Data Difference Score: {details['data_diff_score']:.4f}")
-            data_details = details['data_details']
-            report.append(f"  Row count difference: {data_details['row_count_diff']}")
-            
-            if 'no_common_columns' in data_details and data_details['no_common_columns']:
-                report.append(f"  No common columns for data comparison")
-            else:
-                report.append(f"  Content difference score: {data_details.get('content_diff_score', 1.0):.4f}")
+        yield "TABLE DETAILS:"
+        for table, details in differences["table_details"].items():
+            yield f"\n  Table: {table}"
+            yield f"  ------------------------"
+            for line in ReportGenerator.table_detail_lines(details):
+                yield f"  {line}"
+    
+    @staticmethod
+    def table_detail_lines(details):
+        """Return the report lines describing a single table's differences."""
+        lines = [f"Structure Difference Score: {details['structure_diff_score']:.4f}"]
+        
+        structure_details = details['structure_details']
+        if structure_details['missing_in_db1']:
+            lines.append(f"Columns in DB2 missing from DB1: {', '.join(structure_details['missing_in_db1'])}")
+        if structure_details['missing_in_db2']:
+            lines.append(f"Columns in DB1 missing from DB2: {', '.join(structure_details['missing_in_db2'])}")
+        if structure_details['type_mismatches']:
+            lines.append(f"Columns with type mismatches: {', '.join(structure_details['type_mismatches'])}")
+        
+        if details.get("exact", True):
+            lines.append(f"Data Difference Score: {details['data_diff_score']:.4f}")
+        else:
+            lines.append(f"Data Difference Score: {details['data_diff_score']:.4f} ± {details['data_diff_error_bound']:.4f} (estimate)")
+        data_details = details['data_details']
+        if data_details['row_count_diff'] is None:
+            lines.append("Row count difference: not counted yet")
+        else:
+            lines.append(f"Row count difference: {data_details['row_count_diff']}")
+        if 'engine' in data_details:
+            lines.append(f"Comparison engine: {data_details['engine']}")
+        access_path = data_details.get('access_path')
+        if access_path:
+            lines.append(f"Access path (rows matched by {access_path['match']}"
+                         f"{', index ' + access_path['index'] if access_path['index'] else ''}): "
+                         f"DB1: {access_path['db1']}; DB2: {access_path['db2']}")
+        
+        if 'no_common_columns' in data_details and data_details['no_common_columns']:
+            lines.append(f"No common columns for data comparison")
+        else:
+            lines.append(f"Content difference score: {data_details.get('content_diff_score', 1.0):.4f}")
+        
+        column_mismatches = {col: n for col, n in data_details.get('column_mismatches', {}).items() if n}
+        if column_mismatches:
+            top_columns = sorted(column_mismatches.items(), key=lambda item: -item[1])
+            lines.append("Mismatches by column: " + ", ".join(f"{col}={n}" for col, n in top_columns))
+        ranges = data_details.get('range_mismatches', {}).get('ranges', [])
+        if ranges:
+            unit = data_details['range_mismatches']['unit']
+            hot_spots = sorted(ranges, key=lambda bucket: -bucket['mismatches'])[:REPORT_HOT_SPOT_RANGES]
+            lines.append(f"Mismatch hot spots ({unit}): " + ", ".join(
+                f"{bucket['start']}-{bucket['end']}={bucket['mismatches']}"
+                + (f" (first at {bucket['first_key']})" if bucket['first_key'] is not None else "")
+                for bucket in hot_spots
+            ))
         
-        return "\n".join(report)
+        for col, profile in data_details.get('column_profiles', {}).items():
+            lines.append(f"Column {col}: profile difference {profile['profile_diff_score']:.4f} "
+                         f"(nulls {profile['db1']['null_count']} vs {profile['db2']['null_count']}, "
+                         f"~{profile['db1']['distinct_estimate']} vs ~{profile['db2']['distinct_estimate']} distinct)")
+        return lines
+    
+    @staticmethod
+    def table_summary_rows(differences):
+        """Return one summary dict per compared table, for tabular views of the results."""
+        rows = []
+        for table, details in differences["table_details"].items():
+            data_details = details['data_details']
+            rows.append({
+                "table": table,
+                "structure_diff_score": details['structure_diff_score'],
+                "data_diff_score": details['data_diff_score'],
+                "data_diff_error_bound": details.get('data_diff_error_bound', 0.0),
+                "exact": details.get('exact', True),
+                "row_count_diff": data_details['row_count_diff'],
+                "content_diff_score": None if data_details.get('no_common_columns') else data_details.get('content_diff_score', 1.0)
+            })
+        return rows
         
     @staticmethod
     def save_report_to_file(report_text, filename):
-        """Save the report to a text file."""
+        """Save the report to a text file.
+        
+        ``report_text`` is either the full report string or an iterable of
+        lines (e.g. from ``iter_detailed_report``), which is written as it is
+        produced.
+        """
         try:
             with open(filename, 'w') as f:
-                f.write(report_text)
+                if isinstance(report_text, str):
+                    f.write(report_text)
+                else:
+                    for i, line in enumerate(report_text):
+                        f.write(f"\n{line}" if i else line)
             logger.info(f"Report successfully saved to {filename}")
             return True
         except Exception as e:
             logger.error(f"Failed to save report: {str(e)}")
+            return False
+    
+    @staticmethod
+    def export_results(comparer, filename):
+        """Export the comparison results as structured data, chosen by file extension.
+        
+        ``.jsonl`` writes JSON Lines, ``.results.db`` appends a run to a results
+        database. Any other extension writes the text report.
+        """
+        exporter_class = exporter_for(filename)
+        if exporter_class is None:
+            return ReportGenerator.save_report_to_file(ReportGenerator.iter_detailed_report(comparer), filename)
+        
+        try:
+            with exporter_class(filename) as exporter:
+                exporter.begin(comparer.db1_path, comparer.db2_path)
+                for table, details in comparer.differences["table_details"].items():
+                    exporter.write_table(table, details)
+                exporter.finish(comparer.differences)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to export results: {str(e)}")
             return False
\ No newline at end of file
@@ -0,0 +1,296 @@
+# backend/result_exporters.py
+import json
+import sqlite3
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Number of tables written to a results database between commits
+SQLITE_EXPORT_COMMIT_INTERVAL = 100
+
+
+def _to_json_value(value):
+    """Convert values json cannot encode (sets, numpy scalars) to plain Python."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ResultExporter:
+    """Base class for exporters that write comparison results table by table.
+
+    ``begin`` is called once before the first table, ``write_table`` as soon as
+    each table has been compared and ``finish`` with the final results.
+    Exporters are context managers and close their output on exit.
+    """
+
+    def begin(self, db1_path, db2_path):
+        pass
+
+    def write_table(self, table_name, details):
+        raise NotImplementedError
+
+    def finish(self, differences):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class JsonLinesExporter(ResultExporter):
+    """Write results as JSON Lines: a run record, one record per table, then a summary record."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'w')
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, default=_to_json_value) + "\n")
+
+    def begin(self, db1_path, db2_path):
+        self._write({
+            "type": "run",
+            "started_at": datetime.now().isoformat(),
+            "db1_path": db1_path,
+            "db2_path": db2_path
+        })
+
+    def write_table(self, table_name, details):
+        self._write({"type": "table", "table": table_name, **details})
+        self.file.flush()
+
+    def finish(self, differences):
+        self._write({
+            "type": "summary",
+            "overall_diff_score": differences["overall_diff_score"],
+            "similarity_score": 1 - differences["overall_diff_score"],
+            "table_differences": differences["table_differences"]
+        })
+        logger.info(f"Results exported to {self.filename}")
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class SQLiteResultsExporter(ResultExporter):
+    """Write results into a SQLite database with indexed tables per run.
+
+    Each comparison is a row in ``runs``; per-table scores, column differences
+    timings and mismatch counts reference it by ``run_id`` so several runs can share one file
+    and be queried or diffed against each other.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY,
+            started_at TEXT,
+            finished_at TEXT,
+            db1_path TEXT,
+            db2_path TEXT,
+            overall_diff_score REAL,
+            similarity_score REAL,
+            table_presence_diff_score REAL
+        );
+        CREATE TABLE IF NOT EXISTS missing_tables (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            missing_in TEXT
+        );
+        CREATE TABLE IF NOT EXISTS table_results (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            structure_diff_score REAL,
+            data_diff_score REAL,
+            row_count_diff INTEGER,
+            no_common_columns INTEGER,
+            details TEXT,
+            PRIMARY KEY (run_id, table_name)
+        );
+        CREATE TABLE IF NOT EXISTS column_differences (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            column_name TEXT,
+            difference TEXT
+        );
+        CREATE TABLE IF NOT EXISTS table_scores (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            metric TEXT,
+            value REAL
+        );
+        CREATE TABLE IF NOT EXISTS table_timings (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            phase TEXT,
+            seconds REAL
+        );
+        CREATE TABLE IF NOT EXISTS column_mismatches (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            column_name TEXT,
+            mismatches INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS range_mismatches (
+            run_id INTEGER REFERENCES runs(run_id),
+            table_name TEXT,
+            unit TEXT,
+            range_start INTEGER,
+            range_end INTEGER,
+            mismatches INTEGER,
+            first_key TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_table_results_table ON table_results(table_name, run_id);
+        CREATE INDEX IF NOT EXISTS idx_column_differences_table ON column_differences(run_id, table_name);
+        CREATE INDEX IF NOT EXISTS idx_table_scores_metric ON table_scores(metric, value);
+        CREATE INDEX IF NOT EXISTS idx_table_scores_table ON table_scores(run_id, table_name);
+        CREATE INDEX IF NOT EXISTS idx_table_timings_table ON table_timings(run_id, table_name);
+        CREATE INDEX IF NOT EXISTS idx_column_mismatches_table ON column_mismatches(run_id, table_name);
+        CREATE INDEX IF NOT EXISTS idx_range_mismatches_table ON range_mismatches(run_id, table_name, range_start);
+    """
+
+    # Structure detail keys and how they are recorded in column_differences
+    COLUMN_DIFFERENCES = {
+        "missing_in_db1": "missing_in_db1",
+        "missing_in_db2": "missing_in_db2",
+        "type_mismatches": "type_mismatch"
+    }
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        try:
+            self._check_existing_tables()
+            self.conn.executescript(self.SCHEMA)
+        except Exception:
+            self.conn.close()
+            raise
+        self.run_id = None
+        self.pending_tables = 0
+
+    def _check_existing_tables(self):
+        """Refuse files holding tables other than this exporter's own, e.g. a source database."""
+        expected_conn = sqlite3.connect(":memory:")
+        expected_conn.executescript(self.SCHEMA)
+        expected = {name: _column_names(expected_conn, name) for name in _table_names(expected_conn)}
+        expected_conn.close()
+        for name in _table_names(self.conn):
+            if expected.get(name) != _column_names(self.conn, name):
+                raise ValueError(f"{self.filename} is not a comparison results database "
+                                 f"(it has a table {name!r} of another schema)")
+
+    def begin(self, db1_path, db2_path):
+        cursor = self.conn.execute(
+            "INSERT INTO runs (started_at, db1_path, db2_path) VALUES (?, ?, ?)",
+            (datetime.now().isoformat(), db1_path, db2_path)
+        )
+        self.run_id = cursor.lastrowid
+        self.conn.commit()
+
+    def write_table(self, table_name, details):
+        data_details = details["data_details"]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO table_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, table_name, details["structure_diff_score"], details["data_diff_score"],
+             data_details["row_count_diff"], int(bool(data_details.get("no_common_columns"))),
+             json.dumps(details, default=_to_json_value))
+        )
+
+        structure_details = details["structure_details"]
+        self.conn.executemany(
+            "INSERT INTO column_differences VALUES (?, ?, ?, ?)",
+            [(self.run_id, table_name, column, difference)
+             for key, difference in self.COLUMN_DIFFERENCES.items()
+             for column in sorted(structure_details[key])]
+        )
+
+        scores = {
+            "structure_diff_score": details["structure_diff_score"],
+            "data_diff_score": details["data_diff_score"],
+            **{key: value for key, value in data_details.items() if key.endswith("_score")}
+        }
+        self.conn.executemany(
+            "INSERT INTO table_scores VALUES (?, ?, ?, ?)",
+            [(self.run_id, table_name, metric, float(value)) for metric, value in scores.items()]
+        )
+
+        self.conn.executemany(
+            "INSERT INTO table_timings VALUES (?, ?, ?, ?)",
+            [(self.run_id, table_name, phase, seconds) for phase, seconds in details.get("timings", {}).items()]
+        )
+
+        self.conn.executemany(
+            "INSERT INTO column_mismatches VALUES (?, ?, ?, ?)",
+            [(self.run_id, table_name, column, mismatches)
+             for column, mismatches in data_details.get("column_mismatches", {}).items()]
+        )
+        range_mismatches = data_details.get("range_mismatches", {"unit": None, "ranges": []})
+        self.conn.executemany(
+            "INSERT INTO range_mismatches VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(self.run_id, table_name, range_mismatches["unit"], bucket["start"], bucket["end"],
+              bucket["mismatches"], bucket["first_key"]) for bucket in range_mismatches["ranges"]]
+        )
+
+        self.pending_tables += 1
+        if self.pending_tables >= SQLITE_EXPORT_COMMIT_INTERVAL:
+            self.conn.commit()
+            self.pending_tables = 0
+
+    def finish(self, differences):
+        table_diff = differences["table_differences"]
+        self.conn.executemany(
+            "INSERT INTO missing_tables VALUES (?, ?, ?)",
+            [(self.run_id, table, side) for side in ("db1", "db2") for table in table_diff[f"missing_in_{side}"]]
+        )
+        self.conn.execute(
+            "UPDATE runs SET finished_at = ?, overall_diff_score = ?, similarity_score = ?, "
+            "table_presence_diff_score = ? WHERE run_id = ?",
+            (datetime.now().isoformat(), differences["overall_diff_score"], 1 - differences["overall_diff_score"],
+             table_diff["table_presence_diff_score"], self.run_id)
+        )
+        self.conn.commit()
+        logger.info(f"Results exported to {self.filename} (run {self.run_id})")
+
+    def close(self):
+        if self.conn:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+def _table_names(conn):
+    """Names of the tables of a database, without SQLite's internal ones."""
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite^_%' ESCAPE '^'")]
+
+
+def _column_names(conn, table_name):
+    """Column names of a table, in order."""
+    return [row[1] for row in conn.execute("SELECT * FROM pragma_table_info(?)", (table_name,))]
+
+
+# File name suffix -> exporter class. Results databases get their own suffix so a
+# source database (usually *.db) is never picked by mistake.
+EXPORTERS = {
+    ".jsonl": JsonLinesExporter,
+    ".results.db": SQLiteResultsExporter
+}
+
+
+def exporter_for(filename):
+    """Return the exporter class for a file name, or None for a text report."""
+    filename = filename.lower()
+    for suffix, exporter_class in EXPORTERS.items():
+        if filename.endswith(suffix):
+            return exporter_class
+    return None
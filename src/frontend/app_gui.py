@@ -1,17 +1,40 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import os
+import contextlib
 import sys
 import logging
 import threading
+import time
 from backend.db_comparer import SQLiteComparer
 from backend.report_generator import ReportGenerator
+from backend.db_manager import get_profile_dir
+from backend.engines import ENGINE_MODULES
+from backend.result_exporters import exporter_for
 
 # Add parent directory to path so we can import backend modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 logger = logging.getLogger(__name__)
 
+# Longest time (seconds) the report view may spend rendering before yielding to the event loop
+RENDER_FRAME_BUDGET = 0.012
+# Number of report rows deleted or moved per step when the report view is updated
+RENDER_DELETE_CHUNK = 200
+# Sortable report columns: column id -> (heading, summary row key)
+REPORT_COLUMNS = {
+    "structure": ("Structure Diff", "structure_diff_score"),
+    "data": ("Data Diff", "data_diff_score"),
+    "rows": ("Row Count Diff", "row_count_diff"),
+    "content": ("Content Diff", "content_diff_score")
+}
+# Mismatch heatmap layout: tables shown, and sizes in pixels
+HEATMAP_MAX_TABLES = 200
+HEATMAP_LABEL_WIDTH = 180
+HEATMAP_CELL_WIDTH = 70
+HEATMAP_RANGE_WIDTH = 8
+HEATMAP_ROW_HEIGHT = 20
+
 class DatabaseComparisonApp:
     def __init__(self, root):
         self.root = root
@@ -25,6 +48,22 @@ class DatabaseComparisonApp:
         self.db1_tables = []
         self.db2_tables = []
         
+        # Report view state
+        self.report_rows = []
+        self.report_details = {}
+        self.report_sort = ("data", True)
+        self.expanded_tables = set()
+        # Table -> (values, details) of the rows in the report tree, whose item ids are the table names
+        self._report_items = {}
+        self._render_job = None
+        self._heatmap_job = None
+        
+        # Progressive comparison snapshots: table details merged so far and the
+        # latest snapshot waiting to be shown, shared with the comparison thread
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_details = {}
+        self._pending_snapshot = None
+        
         self.create_widgets()
         logger.info("GUI initialized")
     
@@ -88,6 +127,35 @@ class DatabaseComparisonApp:
         ttk.Radiobutton(selection_frame, text="Compare all tables", 
                         variable=self.compare_scope_var, value="all").pack(anchor=tk.W)
         
+        # Comparison mode options
+        self.compare_mode_var = tk.StringVar(value="full")
+        ttk.Radiobutton(selection_frame, text="Full comparison",
+                        variable=self.compare_mode_var, value="full").pack(anchor=tk.W)
+        progressive_frame = ttk.Frame(selection_frame)
+        progressive_frame.pack(anchor=tk.W)
+        ttk.Radiobutton(progressive_frame, text="Progressive (show estimates while refining), time budget (s):",
+                        variable=self.compare_mode_var, value="progressive").pack(side=tk.LEFT)
+        self.time_budget_var = tk.StringVar()
+        ttk.Entry(progressive_frame, textvariable=self.time_budget_var, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(selection_frame, text="Column profiles (approximate statistics, for huge tables)",
+                        variable=self.compare_mode_var, value="profile").pack(anchor=tk.W)
+        
+        # Optional file results are written to as each table's result is final
+        stream_frame = ttk.Frame(selection_frame)
+        stream_frame.pack(anchor=tk.W)
+        ttk.Label(stream_frame, text="Stream results to (optional):").pack(side=tk.LEFT)
+        self.stream_path_var = tk.StringVar()
+        ttk.Entry(stream_frame, textvariable=self.stream_path_var, width=30).pack(side=tk.LEFT, padx=5)
+        ttk.Button(stream_frame, text="Browse...", command=self.browse_stream_path).pack(side=tk.LEFT)
+        
+        # Comparison engine ("auto" chooses per table)
+        engine_frame = ttk.Frame(selection_frame)
+        engine_frame.pack(anchor=tk.W)
+        ttk.Label(engine_frame, text="Comparison engine:").pack(side=tk.LEFT)
+        self.engine_var = tk.StringVar(value="auto")
+        ttk.Combobox(engine_frame, textvariable=self.engine_var, values=["auto", *ENGINE_MODULES],
+                     state="readonly", width=12).pack(side=tk.LEFT, padx=5)
+        
         # Compare button
         self.compare_btn = ttk.Button(selection_frame, text="Compare Databases", command=self.start_comparison)
         self.compare_btn.pack(pady=10)
@@ -105,6 +173,10 @@ class DatabaseComparisonApp:
         self.similarity_score_var = tk.StringVar(value="--")
         ttk.Label(mid_frame, textvariable=self.similarity_score_var).grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
         
+        ttk.Label(mid_frame, text="Table Presence:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=2)
+        self.table_presence_var = tk.StringVar(value="--")
+        ttk.Label(mid_frame, textvariable=self.table_presence_var).grid(row=2, column=1, sticky=tk.W, padx=5, pady=2)
+        
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
@@ -119,19 +191,42 @@ class DatabaseComparisonApp:
         bottom_frame = ttk.LabelFrame(self.root, text="Detailed Report", padding="10")
         bottom_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # Text widget for the report
-        self.report_text = tk.Text(bottom_frame, wrap=tk.WORD, width=80, height=20)
-        self.report_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Scrollbar for the text widget
-        scrollbar = ttk.Scrollbar(bottom_frame, orient=tk.VERTICAL, command=self.report_text.yview)
+        # Filter controls for the report view
+        filter_frame = ttk.Frame(bottom_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="Table name contains:").pack(side=tk.LEFT)
+        self.report_filter_text_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.report_filter_text_var, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="Min difference score:").pack(side=tk.LEFT)
+        self.report_filter_score_var = tk.StringVar(value="0")
+        ttk.Entry(filter_frame, textvariable=self.report_filter_score_var, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="Apply Filter", command=self.render_report_view).pack(side=tk.LEFT, padx=5)
+        
+        # Tree with one row per table; details are inserted when a row is expanded
+        self.report_tree = ttk.Treeview(bottom_frame, columns=tuple(REPORT_COLUMNS), height=15)
+        self.report_tree.heading("#0", text="Table", command=lambda: self.sort_report_view("table"))
+        self.report_tree.column("#0", width=260)
+        for column_id, (heading, _) in REPORT_COLUMNS.items():
+            self.report_tree.heading(column_id, text=heading, command=lambda c=column_id: self.sort_report_view(c))
+            self.report_tree.column(column_id, width=120, anchor=tk.E)
+        self.report_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.report_tree.bind("<<TreeviewOpen>>", self._expand_report_row)
+        self.report_tree.bind("<<TreeviewClose>>", self._collapse_report_row)
+        
+        # Scrollbar for the report tree
+        scrollbar = ttk.Scrollbar(bottom_frame, orient=tk.VERTICAL, command=self.report_tree.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.report_text.configure(yscrollcommand=scrollbar.set)
+        self.report_tree.configure(yscrollcommand=scrollbar.set)
         
-        # Export button
-        self.export_btn = ttk.Button(self.root, text="Export Report", command=self.export_report)
-        self.export_btn.pack(pady=10)
+        # Export and heatmap buttons
+        button_frame = ttk.Frame(self.root)
+        button_frame.pack(pady=10)
+        self.export_btn = ttk.Button(button_frame, text="Export Report", command=self.export_report)
+        self.export_btn.pack(side=tk.LEFT, padx=5)
         self.export_btn.config(state=tk.DISABLED)
+        self.heatmap_btn = ttk.Button(button_frame, text="Mismatch Heatmap", command=self.show_heatmap)
+        self.heatmap_btn.pack(side=tk.LEFT, padx=5)
+        self.heatmap_btn.config(state=tk.DISABLED)
     
     def create_menu(self):
         """Create the main menu."""
@@ -154,6 +249,7 @@ class DatabaseComparisonApp:
         action_menu.add_separator()
         action_menu.add_command(label="Compare Databases", command=self.start_comparison)
         action_menu.add_command(label="Clear Results", command=self.clear_results)
+        action_menu.add_command(label="Mismatch Heatmap...", command=self.show_heatmap)
         menu_bar.add_cascade(label="Actions", menu=action_menu)
         
         # Help menu
@@ -271,6 +367,16 @@ class DatabaseComparisonApp:
             messagebox.showinfo("Info", "Comparison already in progress")
             return
         
+        # Time budget for progressive comparisons (empty = refine until exact)
+        time_budget = None
+        mode = self.compare_mode_var.get()
+        if mode == "progressive" and self.time_budget_var.get().strip():
+            try:
+                time_budget = float(self.time_budget_var.get())
+            except ValueError:
+                messagebox.showerror("Error", "Time budget must be a number of seconds")
+                return
+        
         # Get selected tables to compare
         selected_tables = None
         if self.compare_scope_var.get() == "selected":
@@ -286,23 +392,41 @@ class DatabaseComparisonApp:
                 "db2": db2_selected
             }
         
+        # Results file, written while the comparison runs
+        stream_path = None
+        if self.stream_path_var.get().strip():
+            stream_path = self.stream_path_var.get().strip()
+            if exporter_for(stream_path) is None:
+                messagebox.showerror("Error", "Results can be streamed to a .jsonl or .results.db file")
+                return
+        
+        self.comparer.engine = self.engine_var.get()
+        
         # Disable controls during comparison
         self.is_comparing = True
         self.compare_btn.config(state=tk.DISABLED)
         self.export_btn.config(state=tk.DISABLED)
+        self.heatmap_btn.config(state=tk.DISABLED)
         
         # Clear previous results
         self.clear_results()
+        self._snapshot_details = {}
         
         # Start comparison in a separate thread
         self.update_progress(0, "Starting comparison...")
         comparison_thread = threading.Thread(target=self.run_comparison, 
-                                           args=(db1_path, db2_path, selected_tables))
+                                           args=(db1_path, db2_path, selected_tables,
+                                                 mode, time_budget, stream_path))
         comparison_thread.daemon = True
         comparison_thread.start()
     
-    def run_comparison(self, db1_path, db2_path, selected_tables=None):
-        """Run the database comparison in a background thread."""
+    def run_comparison(self, db1_path, db2_path, selected_tables=None, mode="full", time_budget=None,
+                       stream_path=None):
+        """Run the database comparison in a background thread.
+        
+        ``mode`` is "full", "progressive" or "profile". With ``stream_path`` each
+        table's results are also written to that file as soon as they are final.
+        """
         try:
             # Connect to databases
             self.update_progress(10, "Connecting to databases...")
@@ -313,10 +437,20 @@ class DatabaseComparisonApp:
             self.update_progress(30, "Analyzing database structures...")
             
             # Compare databases with selected tables
-            if selected_tables:
-                self.comparer.compare_databases(selected_tables=selected_tables)
-            else:
-                self.comparer.compare_databases()
+            with (exporter_for(stream_path)(stream_path) if stream_path else contextlib.nullcontext()) as exporter:
+                if mode == "progressive":
+                    # Refinements are shown as they are published
+                    self.comparer.compare_databases_progressive(
+                        selected_tables=selected_tables,
+                        time_budget=time_budget,
+                        on_update=self._queue_snapshot,
+                        exporter=exporter
+                    )
+                elif mode == "profile":
+                    self.comparer.compare_column_profiles(selected_tables=selected_tables,
+                                                          profile_dir=get_profile_dir(), exporter=exporter)
+                else:
+                    self.comparer.compare_databases(selected_tables=selected_tables, exporter=exporter)
                 
             self.update_progress(90, "Generating report...")
             
@@ -329,37 +463,314 @@ class DatabaseComparisonApp:
             # Capture the error message outside the lambda
             self.root.after(0, lambda msg=error_message: self.handle_error(msg))
     
-    def update_results(self):
-        """Update the UI with comparison results."""
+    def update_results(self, differences=None, final=True):
+        """Update the UI with comparison results.
+        
+        Intermediate snapshots from a progressive comparison are shown with
+        ``final=False``; the controls stay disabled until the final update.
+        """
         try:
+            if differences is None:
+                differences = self.comparer.differences
+            
             # Update score displays
-            diff_score = self.comparer.differences["overall_diff_score"]
-            similarity = self.comparer.similarity_score
+            diff_score = differences["overall_diff_score"]
+            similarity = 1 - diff_score
+            progress = differences.get("progress")
+            bound = f" ± {progress['error_bound']:.4f}" if progress and not progress["exact"] else ""
+            
+            self.diff_score_var.set(f"{diff_score:.4f}{bound} (0=identical, 1=completely different)")
+            self.similarity_score_var.set(f"{similarity:.4f}{bound} (1=identical, 0=completely different)")
             
-            self.diff_score_var.set(f"{diff_score:.4f} (0=identical, 1=completely different)")
-            self.similarity_score_var.set(f"{similarity:.4f} (1=identical, 0=completely different)")
+            table_diff = differences["table_differences"]
+            self.table_presence_var.set(
+                f"{table_diff['common_tables']}/{table_diff['total_tables']} common; "
+                f"missing in DB1: {self._summarize_names(table_diff['missing_in_db1'])}; "
+                f"missing in DB2: {self._summarize_names(table_diff['missing_in_db2'])}"
+            )
             
-            # Generate and display detailed report
-            report = ReportGenerator.generate_detailed_report(self.comparer)
-            self.report_text.delete(1.0, tk.END)
-            self.report_text.insert(tk.END, report)
+            # Display the per-table results, rendered incrementally
+            self.report_rows = ReportGenerator.table_summary_rows(differences)
+            self.report_details = differences["table_details"]
+            self.render_report_view()
+            
+            if not final:
+                total = differences["table_differences"]["common_tables"]
+                value = 30 + 60 * progress["tables_exact"] / total if total else 90
+                self.update_progress(value, f"Refining ({progress['phase']}): {progress['tables_exact']}/{total} tables exact")
+                return
             
             # Enable export button
             self.export_btn.config(state=tk.NORMAL)
+            self.heatmap_btn.config(state=tk.NORMAL)
             
             # Update progress and status
-            self.update_progress(100, "Comparison complete")
+            if progress and not progress["finished"]:
+                self.update_progress(100, f"Time budget reached: estimate within ± {progress['error_bound']:.4f}")
+            elif differences.get("overall_error_bound"):
+                self.update_progress(100, f"Comparison complete: some tables were sampled, "
+                                          f"estimate within ± {differences['overall_error_bound']:.4f}")
+            else:
+                self.update_progress(100, "Comparison complete")
             
         except Exception as e:
             logger.error(f"Error updating results: {str(e)}", exc_info=True)
             self.handle_error(f"Error updating results: {str(e)}")
         finally:
-            # Close connections
-            self.comparer.close_connections()
+            if final:
+                # Close connections
+                self.comparer.close_connections()
+                
+                # Re-enable controls
+                self.compare_btn.config(state=tk.NORMAL)
+                self.is_comparing = False
+    
+    def _queue_snapshot(self, snapshot):
+        """Merge a progressive comparison snapshot and schedule showing it (comparison thread).
+        
+        Snapshots arriving while one is still waiting to be shown replace it,
+        so only the latest one is rendered.
+        """
+        with self._snapshot_lock:
+            self._snapshot_details.update(snapshot["table_details"])
+            already_scheduled = self._pending_snapshot is not None
+            self._pending_snapshot = snapshot
+        if not already_scheduled:
+            self.root.after(0, self._show_pending_snapshot)
+    
+    def _show_pending_snapshot(self):
+        """Show the latest progressive comparison snapshot with all table details merged so far."""
+        with self._snapshot_lock:
+            snapshot = self._pending_snapshot
+            self._pending_snapshot = None
+            differences = dict(snapshot, table_details=dict(self._snapshot_details))
+        self.update_results(differences, final=False)
+    
+    @staticmethod
+    def _summarize_names(names, limit=5):
+        """Format a list of table names, truncated to the first few."""
+        if not names:
+            return "None"
+        shown = ", ".join(sorted(names)[:limit])
+        return shown if len(names) <= limit else f"{shown} (+{len(names) - limit} more)"
+    
+    def sort_report_view(self, column_id):
+        """Sort the report view by a column, toggling the direction on repeated clicks."""
+        current_column, descending = self.report_sort
+        self.report_sort = (column_id, not descending if column_id == current_column else True)
+        self.render_report_view()
+    
+    def render_report_view(self):
+        """Sort and filter the report rows and render them into the tree in batches."""
+        try:
+            min_score = float(self.report_filter_score_var.get() or 0)
+        except ValueError:
+            messagebox.showerror("Error", "Minimum difference score must be a number")
+            return
+        name_filter = self.report_filter_text_var.get().strip().lower()
+        
+        rows = [row for row in self.report_rows
+                if max(row["structure_diff_score"], row["data_diff_score"]) >= min_score
+                and name_filter in row["table"].lower()]
+        column_id, descending = self.report_sort
+        if column_id == "table":
+            rows.sort(key=lambda row: row["table"].lower(), reverse=descending)
+        else:
+            key = REPORT_COLUMNS[column_id][1]
+            rows.sort(key=lambda row: row[key] or 0, reverse=descending)
+            # Rows without a value (e.g. no common columns) always sort last
+            rows.sort(key=lambda row: row[key] is None)
+        
+        self._start_render(rows)
+    
+    def _start_render(self, rows):
+        """Update the report tree to show rows, superseding any render in progress."""
+        work = self._render_rows(rows)
+        self._render_job = work
+        self._pump_render(work)
+    
+    def _render_rows(self, rows):
+        """Generator updating the report tree to show ``rows``, one small step at a time.
+        
+        Each table's row uses the table name as its item id and is kept across
+        renders: changed rows are updated in place, only new tables are
+        inserted, filtered-out rows are detached and rows are put in order with
+        move, which also reattaches them. Rows of tables no longer in the
+        report are deleted. Tables whose rows were expanded stay expanded.
+        """
+        tree = self.report_tree
+        stale = [table for table in self._report_items if table not in self.report_details]
+        for start in range(0, len(stale), RENDER_DELETE_CHUNK):
+            chunk = stale[start:start + RENDER_DELETE_CHUNK]
+            tree.delete(*chunk)
+            for table in chunk:
+                del self._report_items[table]
+            yield
+        
+        order = [row["table"] for row in rows]
+        shown = set(order)
+        attached = tree.get_children()
+        hidden = [table for table in attached if table not in shown]
+        if hidden:
+            tree.detach(*hidden)
+            yield
+        
+        for row in rows:
+            self._show_report_row(row)
+            yield
+        
+        # Rows before ``index`` are in place; a row directly after them needs no move.
+        # Moving also reattaches detached rows.
+        attached = set(tree.get_children())
+        previous = ""
+        moved = 0
+        for index, table in enumerate(order):
+            if table not in attached or tree.prev(table) != previous:
+                tree.move(table, "", index)
+                attached.add(table)
+                moved += 1
+                if moved % RENDER_DELETE_CHUNK == 0:
+                    yield
+            previous = table
+    
+    def _show_report_row(self, row):
+        """Insert a table's report row, or update it in place if its values or details changed."""
+        tree = self.report_tree
+        table = row["table"]
+        data_score = f"{row['data_diff_score']:.4f}"
+        if not row["exact"]:
+            data_score += f" ± {row['data_diff_error_bound']:.4f}"
+        values = (
+            f"{row['structure_diff_score']:.4f}", data_score,
+            "--" if row["row_count_diff"] is None else row["row_count_diff"],
+            "--" if row["content_diff_score"] is None else f"{row['content_diff_score']:.4f}"
+        )
+        details = self.report_details.get(table)
+        known = self._report_items.get(table)
+        if known is None:
+            tree.insert("", tk.END, iid=table, text=table, values=values)
+        elif known[0] != values or known[1] is not details:
+            tree.item(table, values=values)
+            tree.delete(*tree.get_children(table))
+        else:
+            return
+        self._report_items[table] = (values, details)
+        
+        if table in self.expanded_tables:
+            self._insert_detail_lines(table)
+            tree.item(table, open=True)
+        else:
+            # Placeholder child so the row can be expanded; replaced on first expansion
+            tree.insert(table, tk.END, text="...", tags=("placeholder",))
+    
+    def _pump_render(self, work, job_attr="_render_job"):
+        """Advance a render job for at most one frame, then reschedule it.
+        
+        ``job_attr`` names the attribute holding the current job of its kind.
+        """
+        if work is not getattr(self, job_attr):
+            return  # superseded by a newer render
+        deadline = time.monotonic() + RENDER_FRAME_BUDGET
+        for _ in work:
+            if time.monotonic() >= deadline:
+                self.root.after(1, self._pump_render, work, job_attr)
+                return
+        setattr(self, job_attr, None)
+    
+    def _expand_report_row(self, event):
+        """Insert the detail lines of a table the first time its row is expanded."""
+        item = self.report_tree.focus()
+        self.expanded_tables.add(self.report_tree.item(item, "text"))
+        children = self.report_tree.get_children(item)
+        if len(children) != 1 or "placeholder" not in self.report_tree.item(children[0], "tags"):
+            return
+        self.report_tree.delete(children[0])
+        self._insert_detail_lines(item)
+    
+    def _collapse_report_row(self, event):
+        """Forget that a table's row was expanded, so re-renders keep it collapsed."""
+        self.expanded_tables.discard(self.report_tree.item(self.report_tree.focus(), "text"))
+    
+    def _insert_detail_lines(self, item):
+        """Insert the detail lines of the table shown in a report row as its children."""
+        details = self.report_details.get(self.report_tree.item(item, "text"))
+        if details is None:
+            return
+        for line in ReportGenerator.table_detail_lines(details):
+            self.report_tree.insert(item, tk.END, text=line)
+    
+    def show_heatmap(self):
+        """Open a window showing where each table's mismatches are, by column and by row range."""
+        tables = [(table, details["data_details"]) for table, details in self.report_details.items()
+                  if any(details["data_details"].get("column_mismatches", {}).values())]
+        if not tables:
+            messagebox.showinfo("Info", "No mismatches to show")
+            return
+        tables.sort(key=lambda item: -sum(item[1]["column_mismatches"].values()))
+        
+        heatmap = tk.Toplevel(self.root)
+        heatmap.title("Mismatch Heatmap")
+        heatmap.geometry("900x500")
+        shown = min(len(tables), HEATMAP_MAX_TABLES)
+        ttk.Label(heatmap, text=f"Tables with the most mismatches ({shown} of {len(tables)}): "
+                                "columns on the left, row ranges on the right, darker = more mismatches"
+                  ).pack(anchor=tk.W, padx=5, pady=5)
+        
+        frame = ttk.Frame(heatmap)
+        frame.pack(fill=tk.BOTH, expand=True)
+        canvas = tk.Canvas(frame, background="white")
+        y_scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=canvas.yview)
+        x_scroll = ttk.Scrollbar(frame, orient=tk.HORIZONTAL, command=canvas.xview)
+        canvas.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        work = self._draw_heatmap(canvas, tables[:HEATMAP_MAX_TABLES])
+        self._heatmap_job = work
+        self._pump_render(work, "_heatmap_job")
+    
+    @staticmethod
+    def _heat_color(value, maximum):
+        """Shade from white (no mismatches) to red (``maximum`` mismatches)."""
+        level = 255 - int(255 * value / maximum) if maximum else 255
+        return f"#ff{level:02x}{level:02x}"
+    
+    def _draw_heatmap(self, canvas, tables):
+        """Generator drawing one heatmap row per table, shaded relative to that table's maximum."""
+        range_x = HEATMAP_LABEL_WIDTH + HEATMAP_CELL_WIDTH * max(len(d["column_mismatches"]) for _, d in tables) + 20
+        for row, (table, data_details) in enumerate(tables):
+            if not canvas.winfo_exists():
+                return  # window closed
+            y = row * HEATMAP_ROW_HEIGHT
+            middle = y + HEATMAP_ROW_HEIGHT / 2
+            canvas.create_text(4, middle, text=table, anchor=tk.W)
+            
+            # Columns, most mismatches first
+            column_mismatches = sorted(data_details["column_mismatches"].items(), key=lambda item: -item[1])
+            column_max = column_mismatches[0][1]
+            for i, (column, mismatches) in enumerate(column_mismatches):
+                x = HEATMAP_LABEL_WIDTH + i * HEATMAP_CELL_WIDTH
+                canvas.create_rectangle(x, y + 1, x + HEATMAP_CELL_WIDTH - 2, y + HEATMAP_ROW_HEIGHT - 1,
+                                        fill=self._heat_color(mismatches, column_max), outline="#dddddd")
+                canvas.create_text(x + 3, middle, text=f"{column[:6]} {mismatches}", anchor=tk.W,
+                                   font=("TkDefaultFont", 7))
             
-            # Re-enable controls
-            self.compare_btn.config(state=tk.NORMAL)
-            self.is_comparing = False
+            # Row ranges laid out by position, so gaps are ranges without mismatches
+            range_mismatches = data_details.get("range_mismatches", {})
+            ranges = range_mismatches.get("ranges", [])
+            if ranges:
+                first = ranges[0]["start"]
+                width = ranges[0]["end"] - first + 1
+                range_max = max(bucket["mismatches"] for bucket in ranges)
+                for bucket in ranges:
+                    x = range_x + HEATMAP_RANGE_WIDTH * ((bucket["start"] - first) // width)
+                    canvas.create_rectangle(x, y + 1, x + HEATMAP_RANGE_WIDTH, y + HEATMAP_ROW_HEIGHT - 1,
+                                            fill=self._heat_color(bucket["mismatches"], range_max), outline="")
+                canvas.create_text(x + HEATMAP_RANGE_WIDTH + 4, middle, anchor=tk.W, font=("TkDefaultFont", 7),
+                                   text=f"{range_mismatches['unit']} {first}-{ranges[-1]['end']}")
+            canvas.configure(scrollregion=canvas.bbox("all"))
+            yield
     
     def handle_error(self, message):
         """Display error message and reset UI."""
@@ -378,25 +789,43 @@ class DatabaseComparisonApp:
         filename = filedialog.asksaveasfilename(
             title="Save Report",
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+            filetypes=[("Text files", "*.txt"), ("JSON Lines", "*.jsonl"),
+                       ("SQLite results database", "*.results.db"), ("All files", "*.*")]
         )
         
         if filename:
-            report = ReportGenerator.generate_detailed_report(self.comparer)
-            success = ReportGenerator.save_report_to_file(report, filename)
+            # The format is chosen from the file extension
+            success = ReportGenerator.export_results(self.comparer, filename)
             
             if success:
                 messagebox.showinfo("Success", f"Report successfully saved to {filename}")
-            # Error handling is already done in the ReportGenerator class
+            else:
+                # The cause is logged by the ReportGenerator class
+                messagebox.showerror("Error", f"Failed to save the report to {filename}, see the log for details")
+    
+    def browse_stream_path(self):
+        """Choose the file a comparison streams its results to."""
+        filename = filedialog.asksaveasfilename(
+            title="Stream Results To",
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("SQLite results database", "*.results.db")]
+        )
+        if filename:
+            self.stream_path_var.set(filename)
     
     def clear_results(self):
         """Clear all comparison results."""
-        self.report_text.delete(1.0, tk.END)
+        self.report_rows = []
+        self.report_details = {}
+        self.expanded_tables = set()
+        self._start_render([])
         self.diff_score_var.set("--")
+        self.table_presence_var.set("--")
         self.similarity_score_var.set("--")
         self.progress_var.set(0)
         self.status_var.set("Ready")
         self.export_btn.config(state=tk.DISABLED)
+        self.heatmap_btn.config(state=tk.DISABLED)
         logger.info("Results cleared")
     
     def show_about(self):